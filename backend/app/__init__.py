@@ -3,6 +3,7 @@ from .config import Config
 import uuid
 import os
 from .database import db
+from .json_provider import init_json
 
 # Import Blueprints
 from .routes.auth_routes import auth_bp, init_oauth
@@ -16,13 +17,24 @@ from .routes.utility_routes import utility_bp
 from .routes.interview_routes import interview_bp
 from .routes.timeline_routes import timeline_bp
 from .routes.matching_routes import matching_bp
+from .routes.task_routes import task_bp
 
 from .models import User, Job, Profile, Experience, Application, Employee, Performance, Analytics, ChatMessage
+from .commands import register_commands
+from .services.matching_service import matching_service
+from .services.rescoring_service import rescoring_service
+from .services.task_queue import task_queue
+from .services.chat_memory import chat_memory
+from .services.job_search import job_search
+from .services.application_counts import application_counts
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # orjson-backed jsonify when orjson is installed
+    init_json(app)
+
     # This ID changes every time you restart the backend, used for clearing client localStorage
     app.config['SERVER_INSTANCE_ID'] = str(uuid.uuid4())
 
@@ -31,6 +43,15 @@ def create_app():
 
     with app.app_context():
         db.create_all()
+        # create_all skips indexes added to tables that already exist
+        for index in Job.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+
+    # Full-text job search index (tsvector GIN on PostgreSQL, FTS5 on SQLite)
+    job_search.init_app(app)
+
+    # Per-job application counters, backfilled once for existing databases
+    application_counts.init_app(app)
 
     # Register Blueprints
     # Note: url_prefix='/api' is common. Some routes might define their own paths if needed,
@@ -50,8 +71,24 @@ def create_app():
     app.register_blueprint(interview_bp, url_prefix='/api')
     app.register_blueprint(timeline_bp, url_prefix='/api')
     app.register_blueprint(matching_bp, url_prefix='/api')
+    app.register_blueprint(task_bp, url_prefix='/api')
 
     # Initialize OAuth
     init_oauth(app)
 
+    # Background re-scoring of applications
+    rescoring_service.init_app(app)
+
+    # Background queue for slow generative endpoints
+    task_queue.init_app(app)
+
+    # Chat history summaries, refreshed in the background
+    chat_memory.init_app(app)
+
+    # CLI maintenance commands
+    register_commands(app)
+
+    # The spaCy model is lazy; MATCHING_WARMUP loads it and parses the candidate pool at startup
+    matching_service.init_app(app)
+
     return app
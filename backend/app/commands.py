@@ -0,0 +1,52 @@
+import click
+from .config import Config
+from .models import Job, Profile
+from .services.matching_service import matching_service, export_vectors
+from .services.application_counts import application_counts
+
+def register_commands(app):
+    """
+    Registers maintenance commands, e.g. `flask --app app.main precompute-features`.
+    """
+    @app.cli.command('precompute-features')
+    def precompute_features():
+        """Builds the stored matching features for every job and profile."""
+        jobs = Job.query.all()
+        matching_service.get_job_features_many(jobs)
+        click.echo(f"Job features ready for {len(jobs)} jobs.")
+
+        profiles = Profile.query.all()
+        matching_service.get_profile_features_many(profiles)
+        click.echo(f"Profile features ready for {len(profiles)} profiles.")
+        if not Config.PROFILE_FEATURE_PERSIST:
+            click.echo("PROFILE_FEATURE_PERSIST is off: profile features were not stored; "
+                       "servers parse candidates in their background warm-up instead.")
+
+    @app.cli.command('export-vectors')
+    @click.argument('path', required=False)
+    def export_vectors_command(path):
+        """Writes the spaCy vector table to an .npy file for MATCHING_VECTORS_MMAP_PATH."""
+        path = path or Config.MATCHING_VECTORS_MMAP_PATH
+        if not path:
+            raise click.UsageError("Pass a path or set MATCHING_VECTORS_MMAP_PATH.")
+        export_vectors(matching_service.nlp, path)
+        click.echo(f"Vectors written to {path}.")
+
+    @app.cli.command('generate-explanations')
+    @click.argument('job_id', type=int, required=False)
+    @click.option('--overwrite', is_flag=True, help='Regenerate explanations that already exist.')
+    def generate_explanations(job_id, overwrite):
+        """Generates match explanations for the applications to one job, or to every job."""
+        jobs = [Job.query.get(job_id)] if job_id else Job.query.all()
+        if job_id and jobs[0] is None:
+            raise click.BadParameter(f"Job {job_id} not found.", param_hint='job_id')
+        for job in jobs:
+            generated = matching_service.explain_applications(job, overwrite=overwrite)
+            click.echo(f"Job {job.id}: {generated} explanations written.")
+
+    @app.cli.command('reconcile-application-counts')
+    @click.argument('job_id', type=int, required=False)
+    def reconcile_application_counts(job_id):
+        """Rebuilds the per-job application counters from the applications table."""
+        rows = application_counts.reconcile(job_id)
+        click.echo(f"Application counters rebuilt ({rows} job/status rows).")
@@ -6,4 +6,92 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '../.env'))
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SECRET_KEY = os.getenv('SECRET_KEY')
\ No newline at end of file
+    SECRET_KEY = os.getenv('SECRET_KEY')
+
+    # Matching: in-process LRU of parsed profiles, optionally persisted to the profile_features table
+    PROFILE_FEATURE_CACHE_SIZE = int(os.getenv('PROFILE_FEATURE_CACHE_SIZE', 2048))
+    PROFILE_FEATURE_PERSIST = os.getenv('PROFILE_FEATURE_PERSIST', '1') == '1'
+
+    # Matching: process pool for spaCy parsing of batches (0 or 1 = parse on the request thread)
+    MATCHING_POOL_WORKERS = int(os.getenv('MATCHING_POOL_WORKERS', 0))
+    MATCHING_POOL_CHUNK_SIZE = int(os.getenv('MATCHING_POOL_CHUNK_SIZE', 64))
+
+    # Matching: load the spaCy model when the app is created instead of on first use
+    MATCHING_WARMUP = os.getenv('MATCHING_WARMUP', '0') == '1'
+
+    # Matching: candidates (re)parsed inside a top-candidates request; larger backlogs go to a background warm-up
+    PROFILE_MATRIX_INLINE_LIMIT = int(os.getenv('PROFILE_MATRIX_INLINE_LIMIT', 50))
+
+    # Matching: .npy file with the spaCy vector table, memory-mapped and shared by all worker processes
+    MATCHING_VECTORS_MMAP_PATH = os.getenv('MATCHING_VECTORS_MMAP_PATH')
+
+    # Background re-scoring of existing applications after job/profile edits
+    RESCORING_ENABLED = os.getenv('RESCORING_ENABLED', '1') == '1'
+    RESCORING_BATCH_SIZE = int(os.getenv('RESCORING_BATCH_SIZE', 200))
+    RESCORING_DELAY = float(os.getenv('RESCORING_DELAY', 2.0)) # seconds to coalesce bursts of edits
+
+    # LLM response cache: in-memory LRU with TTL, plus an optional SQLite file that survives restarts
+    LLM_CACHE_SIZE = int(os.getenv('LLM_CACHE_SIZE', 512))
+    LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 86400)) # seconds
+    LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH') # e.g. instance/llm_cache.sqlite3
+
+    # Match explanations: how long other workers wait on (and honour) a claim before generating themselves
+    EXPLANATION_CLAIM_TIMEOUT = int(os.getenv('EXPLANATION_CLAIM_TIMEOUT', 60)) # seconds
+    # Match explanations: 'local' builds them from the matching features (optionally LLM-polished), 'llm' asks Gemini
+    EXPLANATION_ENGINE = os.getenv('EXPLANATION_ENGINE', 'local')
+    EXPLANATION_POLISH = os.getenv('EXPLANATION_POLISH', '0') == '1'
+    EXPLANATION_POLISH_TIMEOUT = float(os.getenv('EXPLANATION_POLISH_TIMEOUT', 2.0)) # seconds
+    # Match explanations for a whole applicant pool: candidates per LLM prompt and prompts in flight at once
+    EXPLANATION_BATCH_SIZE = int(os.getenv('EXPLANATION_BATCH_SIZE', 8))
+    EXPLANATION_CONCURRENCY = int(os.getenv('EXPLANATION_CONCURRENCY', 4))
+
+    # LLM metrics: rolling summary window and prices (USD per 1M tokens) for the cost estimate
+    LLM_METRICS_WINDOW = int(os.getenv('LLM_METRICS_WINDOW', 300)) # seconds
+    LLM_PRICE_PER_1M_INPUT_TOKENS = float(os.getenv('LLM_PRICE_PER_1M_INPUT_TOKENS', 0.30))
+    LLM_PRICE_PER_1M_OUTPUT_TOKENS = float(os.getenv('LLM_PRICE_PER_1M_OUTPUT_TOKENS', 2.50))
+
+    # Prompt token budgets per LLM task, e.g. PROMPT_TOKEN_BUDGETS="explanation=1200,performance_insights=800"
+    PROMPT_TOKEN_BUDGET_DEFAULT = int(os.getenv('PROMPT_TOKEN_BUDGET_DEFAULT', 2000))
+    PROMPT_TOKEN_BUDGETS = {
+        'explanation': 1200,
+        'explanation_batch': 4000,
+        'mock_interview_questions': 400,
+        'performance_insights': 800,
+        'chat_summary': 1500,
+        **{task.strip(): int(tokens) for task, tokens in (
+            item.split('=') for item in os.getenv('PROMPT_TOKEN_BUDGETS', '').split(',') if '=' in item
+        )}
+    }
+
+    # Mock LLM streaming: chunk size (characters) and pause between chunks, to measure time-to-first-byte offline
+    LLM_MOCK_STREAM_CHUNK_SIZE = int(os.getenv('LLM_MOCK_STREAM_CHUNK_SIZE', 16))
+    LLM_MOCK_STREAM_DELAY = float(os.getenv('LLM_MOCK_STREAM_DELAY', 0.05)) # seconds
+
+    # Background task queue for slow generative endpoints (?async=1)
+    TASK_QUEUE_WORKERS = int(os.getenv('TASK_QUEUE_WORKERS', 4))
+    TASK_QUEUE_MAX_PENDING = int(os.getenv('TASK_QUEUE_MAX_PENDING', 100)) # queued + running before new tasks are refused
+    TASK_RESULT_TTL = int(os.getenv('TASK_RESULT_TTL', 3600)) # seconds a finished task stays pollable
+
+    # Chat memory: the last N turns are sent verbatim, older ones through a rolling summary refreshed in the background
+    CHAT_MEMORY_TURNS = int(os.getenv('CHAT_MEMORY_TURNS', 4)) # user + assistant message pairs
+    CHAT_MEMORY_MESSAGE_CHARS = int(os.getenv('CHAT_MEMORY_MESSAGE_CHARS', 1000)) # per message in the window
+    CHAT_SUMMARY_BATCH = int(os.getenv('CHAT_SUMMARY_BATCH', 4)) # messages past the window before the summary is refreshed
+    CHAT_MEMORY_BACKLOG = int(os.getenv('CHAT_MEMORY_BACKLOG', 8)) # unsummarized messages past the window still sent while the summary lags
+
+    # Chat semantic answer cache: near-duplicate standalone questions in the same scope reuse an earlier answer
+    CHAT_SEMANTIC_CACHE = os.getenv('CHAT_SEMANTIC_CACHE', '1') == '1'
+    CHAT_CACHE_SIZE = int(os.getenv('CHAT_CACHE_SIZE', 1000))
+    CHAT_CACHE_TTL = int(os.getenv('CHAT_CACHE_TTL', 86400)) # seconds
+    CHAT_CACHE_THRESHOLD = float(os.getenv('CHAT_CACHE_THRESHOLD', 0.92)) # cosine similarity of the prompt vectors
+    CHAT_CACHE_PER_USER = os.getenv('CHAT_CACHE_PER_USER', '0') == '1' # never share answers between users
+
+    # Job listings: keyset-paginated page sizes and how long the cached total count is reused
+    JOBS_PAGE_SIZE = int(os.getenv('JOBS_PAGE_SIZE', 20))
+    JOBS_MAX_PAGE_SIZE = int(os.getenv('JOBS_MAX_PAGE_SIZE', 100))
+    JOBS_COUNT_TTL = int(os.getenv('JOBS_COUNT_TTL', 30)) # seconds
+
+    # Job search facets: most frequent values returned per facet
+    JOBS_FACET_VALUES = int(os.getenv('JOBS_FACET_VALUES', 20))
+
+    # Applications at or above this match score count as qualified in HR job listings
+    QUALIFIED_MATCH_SCORE = float(os.getenv('QUALIFIED_MATCH_SCORE', 80))
@@ -0,0 +1,44 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError: # optional: Flask's stdlib json provider is used without it
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson, several times faster than the stdlib encoder on large
+    listings. datetimes are written natively as ISO 8601; naive ones (all model timestamps are
+    UTC) get an explicit +00:00 so browsers don't read them as local time. Anything orjson can't
+    encode goes through Flask's default hook (Decimal, __html__, ...).
+    """
+    def _options(self, indent=False, sort_keys=None):
+        option = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if set(kwargs) - {'indent', 'sort_keys', 'default'} or kwargs.get('indent') not in (None, 0, 2):
+            # e.g. a custom cls, separators or a 4-space indent: only the stdlib encoder knows them
+            return super().dumps(obj, **kwargs)
+        option = self._options(kwargs.get('indent'), kwargs.get('sort_keys'))
+        return orjson.dumps(obj, default=kwargs.get('default') or self.default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent))
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def init_json(app):
+    """Uses the orjson provider when orjson is installed."""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
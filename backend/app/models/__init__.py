@@ -8,4 +8,10 @@ from .performance import Performance
 from .analytics import Analytics
 from .chat_message import ChatMessage
 from .education import Education
-from .interview import Interview
\ No newline at end of file
+from .interview import Interview
+from .job_feature import JobFeature
+from .profile_feature import ProfileFeature
+from .explanation_claim import ExplanationClaim
+from .task import Task
+from .chat_summary import ChatSummary
+from .job_application_count import JobApplicationCount
\ No newline at end of file
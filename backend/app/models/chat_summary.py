@@ -0,0 +1,10 @@
+from ..database import db
+from datetime import datetime
+
+class ChatSummary(db.Model):
+    # Rolling summary of a user's chat history, folded forward by the chat memory service
+    __tablename__ = 'chat_summaries'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    summary = db.Column(db.Text, nullable=False, default='')
+    last_message_id = db.Column(db.Integer, nullable=False, default=0) # Newest ChatMessage folded into the summary
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,9 @@
+from ..database import db
+from datetime import datetime
+
+class ExplanationClaim(db.Model):
+    # One row while a worker is generating the match explanation of an application.
+    # The primary key makes taking the claim atomic across workers.
+    __tablename__ = 'explanation_claims'
+    application_id = db.Column(db.Integer, db.ForeignKey('applications.id', ondelete='CASCADE'), primary_key=True)
+    claimed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -3,16 +3,20 @@ from datetime import datetime
 
 class Job(db.Model):
     __tablename__ = 'jobs'
+    __table_args__ = (
+        # Keyset pagination of listings walks (created_at, id)
+        db.Index('ix_jobs_created_at_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     company = db.Column(db.String(120))
-    department = db.Column(db.String(120))
-    location = db.Column(db.String(120))
-    type = db.Column(db.String(50))
-    remote_option = db.Column(db.String(50))
-    experience_level = db.Column(db.String(50))
-    education = db.Column(db.String(120))
+    department = db.Column(db.String(120), index=True)
+    location = db.Column(db.String(120), index=True)
+    type = db.Column(db.String(50), index=True)
+    remote_option = db.Column(db.String(50), index=True)
+    experience_level = db.Column(db.String(50), index=True)
+    education = db.Column(db.String(120), index=True)
     salary = db.Column(db.String(50))
     tags = db.Column(db.String(255))  # comma-separated tags
     benefits = db.Column(db.String(255))  # comma-separated benefits
@@ -20,4 +24,6 @@ class Job(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     posted_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     posted_by_user = db.relationship('User', back_populates='jobs_posted')
-    applications = db.relationship('Application', back_populates='job', cascade='all, delete-orphan')
\ No newline at end of file
+    applications = db.relationship('Application', back_populates='job', cascade='all, delete-orphan')
+    feature = db.relationship('JobFeature', uselist=False, back_populates='job', cascade='all, delete-orphan')
+    application_counts = db.relationship('JobApplicationCount', cascade='all, delete-orphan')
\ No newline at end of file
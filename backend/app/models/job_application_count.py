@@ -0,0 +1,10 @@
+from ..database import db
+
+class JobApplicationCount(db.Model):
+    # Denormalized application counters of a job, one row per status.
+    # Kept current by the application write paths (services/application_counts.py).
+    __tablename__ = 'job_application_counts'
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    qualified = db.Column(db.Integer, nullable=False, default=0) # match_score >= QUALIFIED_MATCH_SCORE
@@ -0,0 +1,11 @@
+from ..database import db
+from datetime import datetime
+
+class JobFeature(db.Model):
+    __tablename__ = 'job_features'
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id'), primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False) # sha256 of the text the features were built from
+    lemmas = db.Column(db.Text) # JSON list of core lemmas (title + tags)
+    vector = db.Column(db.LargeBinary) # float32 document vector (title + tags + description)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    job = db.relationship('Job', back_populates='feature')
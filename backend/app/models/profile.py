@@ -14,6 +14,7 @@ class Profile(db.Model):
     user = db.relationship('User', back_populates='profile')
     experiences = db.relationship('Experience', back_populates='profile', cascade='all, delete-orphan')
     educations = db.relationship('Education', back_populates='profile', cascade='all, delete-orphan')
+    feature = db.relationship('ProfileFeature', uselist=False, back_populates='profile', cascade='all, delete-orphan')
 
     def calculate_completeness(self):
         score = 0
@@ -0,0 +1,11 @@
+from ..database import db
+from datetime import datetime
+
+class ProfileFeature(db.Model):
+    __tablename__ = 'profile_features'
+    profile_id = db.Column(db.Integer, db.ForeignKey('profiles.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0) # Bumped on every profile/experience/education edit
+    lemmas = db.Column(db.Text) # JSON list of profile lemmas, NULL until computed for this version
+    vector = db.Column(db.LargeBinary) # float32 document vector, NULL until computed for this version
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    profile = db.relationship('Profile', back_populates='feature')
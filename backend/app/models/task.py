@@ -0,0 +1,29 @@
+from ..database import db
+from datetime import datetime
+import json
+
+class Task(db.Model):
+    # A slow generative request run in the background; clients poll GET /api/tasks/<id>
+    __tablename__ = 'tasks'
+    id = db.Column(db.String(36), primary_key=True) # uuid4
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=True)
+    kind = db.Column(db.String(50), nullable=False) # e.g., 'generate_jd'
+    status = db.Column(db.String(20), default='queued', nullable=False) # 'queued', 'running', 'done', 'failed'
+    result = db.Column(db.Text) # JSON payload of the endpoint
+    status_code = db.Column(db.Integer) # HTTP status the endpoint would have answered with
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, index=True)
+
+    def to_dict(self):
+        # Datetimes are left to the app's JSON provider, like every serializer: UTC with an explicit offset
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'result': json.loads(self.result) if self.result else None,
+            'status_code': self.status_code,
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
@@ -1,9 +1,14 @@
 from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy.exc import IntegrityError
 from ..database import db
-from ..models import Application, User, Job
+from ..models import Application, User, Job, ExplanationClaim
 from ..utils import get_current_user
 from ..services.matching_service import matching_service
+from ..services.application_counts import application_counts
+from ..serializers import application_serializer, wants
+from datetime import datetime, timedelta
 import json
+import time
 
 application_bp = Blueprint('application_bp', __name__)
 
@@ -22,6 +27,7 @@ def accept_offer(app_id):
         return jsonify({'error': 'No pending offer to accept'}), 400
 
     app.status = 'accepted'
+    application_counts.status_changed(app, 'offer_extended')
     db.session.commit()
     return jsonify({'message': 'Offer accepted successfully', 'status': app.status})
 
@@ -57,6 +63,7 @@ def create_application():
     )
     # TODO: Handle cover_letter if model supports
     db.session.add(app)
+    application_counts.added(app)
     db.session.commit()
     return jsonify({'message': 'Application submitted successfully', 'id': app.id}), 201
 
@@ -131,7 +138,9 @@ def withdraw_application(app_id):
     if app.user_id != user.id:
         return jsonify({'error': 'Not found or forbidden'}), 404
 
+    old_status = app.status
     app.status = 'withdrawn'
+    application_counts.status_changed(app, old_status)
     db.session.commit()
     return jsonify({'message': 'Application withdrawn successfully'})
 
@@ -170,39 +179,36 @@ def get_company_applications():
         query = query.filter_by(status=status)
 
     applications = query.all()
+    fields = application_serializer.selected()
     enriched = []
     for app in applications:
         job = app.job
-        user = User.query.get(app.user_id)
+        user = app.user
+        extra = {
+            'candidate_name': f"{user.first_name} {user.last_name}" if user else 'Unknown',
+            'job_title': job.title if job else ''
+        }
 
-        try:
-            analysis = json.loads(app.match_explanation) if app.match_explanation else None
-        except:
-            analysis = None
+        if wants(fields, 'match_analysis'):
+            try:
+                extra['match_analysis'] = json.loads(app.match_explanation) if app.match_explanation else None
+            except:
+                extra['match_analysis'] = None
 
         # Fetch Interview Details
-        interview_info = None
-        if app.interviews:
-            # Sort to get the latest interview
-            latest_interview = sorted(app.interviews, key=lambda x: x.scheduled_at, reverse=True)[0]
-            interview_info = {
-                'scheduled_at': latest_interview.scheduled_at.isoformat(),
-                'location_type': latest_interview.location_type,
-                'location_detail': latest_interview.location_detail
-            }
-
-        enriched.append({
-            'id': app.id,
-            'user_id': app.user_id,
-            'job_id': app.job_id,
-            'status': app.status,
-            'applied_at': app.applied_at,
-            'candidate_name': f"{user.first_name} {user.last_name}" if user else 'Unknown',
-            'job_title': job.title if job else '',
-            'match_score': app.match_score,
-            'match_analysis': analysis,
-            'interview_details': interview_info # Added interview info
-        })
+        if wants(fields, 'interview_details'):
+            interview_info = None
+            if app.interviews:
+                # Sort to get the latest interview
+                latest_interview = sorted(app.interviews, key=lambda x: x.scheduled_at, reverse=True)[0]
+                interview_info = {
+                    'scheduled_at': latest_interview.scheduled_at.isoformat(),
+                    'location_type': latest_interview.location_type,
+                    'location_detail': latest_interview.location_detail
+                }
+            extra['interview_details'] = interview_info
+
+        enriched.append(application_serializer.dump(app, fields, **extra))
     return jsonify({'pagination': {}, 'applications': enriched})
 
 @application_bp.route('/hr/applications/<int:app_id>', methods=['GET'])
@@ -236,7 +242,9 @@ def update_application_status(app_id):
     data = request.json
     status = data.get('status')
     if status:
+        old_status = app.status
         app.status = status
+        application_counts.status_changed(app, old_status)
     db.session.commit()
     return jsonify({'message': 'Application status updated'})
 
@@ -256,23 +264,74 @@ def get_application_explanation(app_id):
         except:
             return jsonify({'error': 'Invalid stored data'}), 500
 
-    # 2. If not, generate it now (Incurs API cost)
+    # 2. Only one worker generates each explanation; the others wait for its result
+    if not _claim_explanation(app.id):
+        explanation_json_str = _wait_for_explanation(app.id)
+        if explanation_json_str:
+            return jsonify(json.loads(explanation_json_str))
+        # The claim holder gave up or timed out: take over
+        _claim_explanation(app.id)
+
+    # 3. Generate it now (local fast path by default, see EXPLANATION_ENGINE)
     candidate_profile = app.user.profile
     job = app.job
     
-    # Generate
-    explanation_json_str = matching_service.generate_explanation(
-        candidate_profile, 
-        job, 
-        app.match_score
-    )
+    try:
+        explanation_json_str = matching_service.explain(
+            candidate_profile, 
+            job, 
+            app.match_score
+        )
+    except Exception:
+        db.session.rollback()
+        _release_explanation_claim(app.id)
+        raise
     
-    # 3. Save to DB for future use
+    # 4. Save to DB for future use, releasing the claim in the same commit
     app.match_explanation = explanation_json_str
+    ExplanationClaim.query.filter_by(application_id=app.id).delete()
     db.session.commit()
     
     return jsonify(json.loads(explanation_json_str))
 
+def _claim_explanation(app_id):
+    """
+    Takes the row-level claim to generate an application's explanation.
+    Returns False if another worker holds a live claim.
+    """
+    timeout = current_app.config.get('EXPLANATION_CLAIM_TIMEOUT', 60)
+    # Drop a claim left behind by a worker that died mid-generation
+    ExplanationClaim.query.filter(
+        ExplanationClaim.application_id == app_id,
+        ExplanationClaim.claimed_at < datetime.utcnow() - timedelta(seconds=timeout)
+    ).delete()
+    db.session.add(ExplanationClaim(application_id=app_id))
+    try:
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+def _release_explanation_claim(app_id):
+    ExplanationClaim.query.filter_by(application_id=app_id).delete()
+    db.session.commit()
+
+def _wait_for_explanation(app_id):
+    """
+    Polls until the claim holder stores the explanation. Returns None if it gives up or times out.
+    """
+    deadline = time.monotonic() + current_app.config.get('EXPLANATION_CLAIM_TIMEOUT', 60)
+    while time.monotonic() < deadline:
+        db.session.rollback() # End the transaction so other workers' commits are visible
+        explanation = db.session.query(Application.match_explanation).filter_by(id=app_id).scalar()
+        if explanation:
+            return explanation
+        if db.session.get(ExplanationClaim, app_id) is None:
+            return None
+        time.sleep(0.5)
+    return None
+
 # --- HR - Screening & Feedback (Scaffold) ---
 
 @application_bp.route('/hr/screening-forms', methods=['POST'])
@@ -3,6 +3,7 @@ from flask import Blueprint, request, jsonify, current_app
 from ..database import db
 from ..models import Employee, Performance, User, Profile
 from ..utils import get_current_user
+from ..serializers import employee_serializer, wants
 
 employee_bp = Blueprint('employee_bp', __name__)
 
@@ -17,50 +18,23 @@ def get_employees():
     # Fetch all employees hired by this HR
     employees = Employee.query.filter_by(hired_by=user.id).all()
 
+    fields = employee_serializer.selected()
     employee_list = []
     for e in employees:
-        user_obj = e.user 
-        full_name = f"{user_obj.first_name} {user_obj.last_name}" if user_obj else "Unknown"
-        
-        # Calculate Average Rating
-        ratings = [p.rating for p in e.performances if p.rating]
-        avg_rating = round(sum(ratings) / len(ratings), 1) if ratings else 0
-
-        # Get Latest Review
-        latest_review = None
-        if e.performances:
-            # Sort by date descending
-            sorted_perfs = sorted(e.performances, key=lambda x: x.date, reverse=True)
-            latest_review = {
-                'rating': sorted_perfs[0].rating,
-                'date': sorted_perfs[0].date.isoformat(),
-                'comments': sorted_perfs[0].comments
-            }
-
-        employee_list.append({
-            'id': e.id,
-            'user_id': e.user_id,
-            'first_name': user_obj.first_name if user_obj else "",
-            'last_name': user_obj.last_name if user_obj else "",
-            'name': full_name,
-            'email': user_obj.email if user_obj else "",
-            'phone': user_obj.profile.phone if (user_obj and user_obj.profile) else "",
-            'job_title': e.job_title,
-            'department': e.department,
-            'job_location': e.job_location,
-            'employment_type': e.employment_type,
-            'salary': e.salary,
-            'hired_at': e.hired_at,
-            'photo_url': e.photo,
-            'manager_id': getattr(e, 'manager_id', None),
-            'performance_avg': avg_rating,
-            'performances': [{
+        extra = {}
+        if wants(fields, 'performance_avg'):
+            # Calculate Average Rating
+            ratings = [p.rating for p in e.performances if p.rating]
+            extra['performance_avg'] = round(sum(ratings) / len(ratings), 1) if ratings else 0
+        if wants(fields, 'performances'):
+            extra['performances'] = [{
                 'id': p.id,
                 'date': p.date.isoformat(),
                 'rating': p.rating,
                 'comments': p.comments
             } for p in e.performances]
-        })
+
+        employee_list.append(employee_serializer.dump(e, fields, **extra))
 
     return jsonify({
         'employees': employee_list
@@ -69,17 +43,10 @@ def get_employees():
 @employee_bp.route('/hr/employees/<int:emp_id>', methods=['GET'])
 def get_employee(emp_id):
     e = Employee.query.get_or_404(emp_id)
-    return jsonify({
-        'id': e.id,
-        'user_id': e.user_id,
-        'job_title': e.job_title,
-        'department': e.department,
-        'job_location': e.job_location,
-        'salary': e.salary,
-        'hired_at': e.hired_at,
-        'photo_url': e.photo,
-        'manager_id': getattr(e, 'manager_id', None),
-        'performances': [
+    fields = employee_serializer.selected()
+    extra = {}
+    if wants(fields, 'performances'):
+        extra['performances'] = [
             {
                 'id': p.id,
                 'metric': p.metric,
@@ -89,7 +56,7 @@ def get_employee(emp_id):
                 'comments': getattr(p, 'comments', None)
             } for p in e.performances
         ]
-    })
+    return jsonify(employee_serializer.dump(e, fields, **extra))
 
 @employee_bp.route('/hr/employees', methods=['POST'])
 def create_employee():
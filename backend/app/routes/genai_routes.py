@@ -1,12 +1,112 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
 from ..services.llm_service import llm_service
+from ..services.task_queue import task_queue
+from ..services.prompt_builder import PromptBuilder
+from ..services.chat_memory import chat_memory
+from ..services.semantic_cache import chat_answer_cache
 from ..models import Job, Application, User, ChatMessage, Employee # Added Employee
 from ..database import db
 from ..utils import get_current_user
 import json
+import re
+import time
 
 genai_bp = Blueprint('genai_bp', __name__)
 
+def _chat_system_context(user, context):
+    """
+    Builds the chat system prompt, enriched with the job/application the user is asking about.
+    """
+    system_context = f"You are a helpful HR assistant named HireHero AI. The user is {user.first_name}."
+
+    if context.get('job_id'):
+        job = Job.query.get(context['job_id'])
+        if job:
+            system_context += f"\nContext: The user is asking about Job #{job.id}: {job.title} at {job.company}."
+
+    if context.get('application_id'):
+        app = Application.query.get(context['application_id'])
+        if app:
+            system_context += f"\nContext: The user is asking about Application #{app.id}. Status: {app.status}."
+
+    return system_context
+
+def _sse(data, event=None):
+    """
+    Formats one Server-Sent Event.
+    """
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+def _chat_cache_scope(user, context):
+    """
+    Which cached answers a chat prompt may reuse. Application questions stay private to the user;
+    general and job questions are shared by users of the same role unless CHAT_CACHE_PER_USER is set.
+    """
+    if context.get('application_id'):
+        return f"user:{user.id}:application:{context['application_id']}"
+    owner = f"user:{user.id}" if current_app.config.get('CHAT_CACHE_PER_USER') else f"role:{user.role}"
+    if context.get('job_id'):
+        return f"{owner}:job:{context['job_id']}"
+    return f"{owner}:general"
+
+def _cached_chat_answer(scope, prompt, user_prompt):
+    """
+    Looks up an earlier answer to a near-identical question; hits are counted as 'semantic_hit' chat calls.
+    Only standalone turns are looked up, the same rule as for storing: a follow-up that comes with
+    conversation memory ("and the second one?") can't be answered from someone else's context.
+    """
+    if not current_app.config.get('CHAT_SEMANTIC_CACHE') or user_prompt != prompt:
+        return None
+    started = time.perf_counter()
+    try:
+        reply = chat_answer_cache.lookup(scope, prompt)
+    except Exception as e:
+        print(f"Semantic cache lookup failed: {e}")
+        return None
+    if reply is not None:
+        llm_service.metrics.record('chat', time.perf_counter() - started, 'semantic_hit',
+                                   prompt_chars=len(prompt), response_chars=len(reply))
+    return reply
+
+def _remember_chat_answer(user, scope, prompt, user_prompt, reply):
+    """
+    Caches an answer only if it stands on its own: no fallback text, no conversation memory in the
+    prompt, and, when the scope is shared, no mention of the user's name.
+    """
+    if not current_app.config.get('CHAT_SEMANTIC_CACHE'):
+        return
+    if llm_service.last_outcome() not in ('model', 'mock') or user_prompt != prompt:
+        return
+    if not scope.startswith(f"user:{user.id}:") and user.first_name \
+            and re.search(rf"\b{re.escape(user.first_name)}\b", reply, re.I):
+        return
+    try:
+        chat_answer_cache.store(scope, prompt, reply)
+    except Exception as e:
+        print(f"Semantic cache store failed: {e}")
+
+def _async_requested():
+    """
+    Slow generative endpoints run in the background when called with ?async=1 (or "async": true in the body).
+    """
+    body = request.get_json(silent=True) or {}
+    return request.args.get('async') in ('1', 'true') or body.get('async') is True
+
+def _run_or_enqueue(kind, fn, user=None):
+    """
+    Runs fn inline, or in async mode queues it and answers 202 with a task id to poll at /api/tasks/<id>.
+    fn returns (payload, status_code) and must only use plain values captured from the request.
+    """
+    if not _async_requested():
+        payload, status_code = fn()
+        return jsonify(payload), status_code
+
+    task = task_queue.submit(kind, fn, user_id=user.id if user else None)
+    if task is None:
+        return jsonify({'error': 'Too many pending tasks, try again later'}), 503
+    return jsonify({'task_id': task.id, 'status': task.status}), 202, {'Location': f'/api/tasks/{task.id}'}
+
 @genai_bp.route('/gen-ai/chat', methods=['POST'])
 def chat_with_ai():
     user = get_current_user()
@@ -25,26 +125,24 @@ def chat_with_ai():
     db.session.add(user_msg)
     db.session.commit()
 
-    # Enrich context
-    system_context = f"You are a helpful HR assistant named HireHero AI. The user is {user.first_name}."
-
-    if context.get('job_id'):
-        job = Job.query.get(context['job_id'])
-        if job:
-            system_context += f"\nContext: The user is asking about Job #{job.id}: {job.title} at {job.company}."
-
-    if context.get('application_id'):
-        app = Application.query.get(context['application_id'])
-        if app:
-            system_context += f"\nContext: The user is asking about Application #{app.id}. Status: {app.status}."
+    system_context = _chat_system_context(user, context)
+    # Recent turns plus the rolling summary of older ones
+    user_prompt = chat_memory.build_prompt(user.id, prompt, user_msg.id)
 
     # Generate Response
-    reply = llm_service.generate_text(system_context, prompt)
+    # Chat is conversational, never serve it from the exact-match response cache;
+    # near-duplicate standalone questions are answered from the semantic cache instead
+    scope = _chat_cache_scope(user, context)
+    reply = _cached_chat_answer(scope, prompt, user_prompt)
+    if reply is None:
+        reply = llm_service.generate_text(system_context, user_prompt, cache=False, task='chat')
+        _remember_chat_answer(user, scope, prompt, user_prompt, reply)
 
     # 2. Save Bot Response
     bot_msg = ChatMessage(user_id=user.id, sender='bot', message=reply)
     db.session.add(bot_msg)
     db.session.commit()
+    chat_memory.note_turn(user.id)
 
     return jsonify({
         'reply': reply,
@@ -52,6 +150,71 @@ def chat_with_ai():
         'follow_up_questions': ['How can I improve my resume?', 'What is the interview process?']
     })
 
+# --- Streaming Chat (Server-Sent Events) ---
+@genai_bp.route('/gen-ai/chat/stream', methods=['POST'])
+def chat_with_ai_stream():
+    user = get_current_user()
+    if not user:
+         return jsonify({'error': 'Unauthorized'}), 401
+
+    data = request.json or {}
+    prompt = data.get('prompt')
+    context = data.get('context', {})
+
+    if not prompt:
+        return jsonify({'error': 'Prompt is required'}), 400
+
+    # 1. Save User Message
+    user_msg = ChatMessage(user_id=user.id, sender='user', message=prompt)
+    db.session.add(user_msg)
+    db.session.commit()
+
+    system_context = _chat_system_context(user, context)
+    user_prompt = chat_memory.build_prompt(user.id, prompt, user_msg.id)
+    user_id = user.id
+    session_id = data.get('session_id', 'session_123')
+    scope = _chat_cache_scope(user, context)
+    cached_reply = _cached_chat_answer(scope, prompt, user_prompt)
+
+    def generate():
+        chunks = []
+        complete = False
+        try:
+            if cached_reply is not None:
+                stream = [cached_reply]
+            else:
+                stream = llm_service.generate_text_stream(system_context, user_prompt)
+            for chunk in stream:
+                chunks.append(chunk)
+                yield _sse({'delta': chunk})
+            complete = cached_reply is not None or llm_service.last_outcome() != 'error'
+            if cached_reply is None and complete:
+                _remember_chat_answer(user, scope, prompt, user_prompt, ''.join(chunks))
+        finally:
+            # 2. Save Bot Response once the whole answer went out; a reply cut off by an upstream
+            # error or a client disconnect stays out of the history, the memory and the cache
+            reply = ''.join(chunks)
+            if reply and complete:
+                db.session.add(ChatMessage(user_id=user_id, sender='bot', message=reply))
+                db.session.commit()
+                chat_memory.note_turn(user_id)
+
+        if not complete:
+            yield _sse({'error': 'The answer was interrupted. Please try again.', 'partial_reply': reply}, event='error')
+            return
+
+        yield _sse({
+            'reply': reply,
+            'session_id': session_id,
+            'follow_up_questions': ['How can I improve my resume?', 'What is the interview process?']
+        }, event='done')
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 # --- NEW: Get Chat History ---
 @genai_bp.route('/gen-ai/history', methods=['GET'])
 def get_chat_history():
@@ -78,6 +241,7 @@ def clear_chat_history():
         return jsonify({'error': 'Unauthorized'}), 401
         
     ChatMessage.query.filter_by(user_id=user.id).delete()
+    chat_memory.forget(user.id)
     db.session.commit()
     
     return jsonify({'message': 'History cleared'})
@@ -113,25 +277,28 @@ def generate_jd():
     
     user_prompt = f"Generate a detailed Job Description for the position of '{title}' at '{company}' in the '{department}' department."
 
-    response_text = llm_service.generate_text(system_prompt, user_prompt)
+    def run():
+        response_text = llm_service.generate_text(system_prompt, user_prompt, task='jd')
 
-    # Clean up markdown if Gemini adds it despite instructions
-    if response_text.startswith("```json"):
-        response_text = response_text.replace("```json", "").replace("```", "")
-    elif response_text.startswith("```"):
-        response_text = response_text.replace("```", "")
+        # Clean up markdown if Gemini adds it despite instructions
+        if response_text.startswith("```json"):
+            response_text = response_text.replace("```json", "").replace("```", "")
+        elif response_text.startswith("```"):
+            response_text = response_text.replace("```", "")
 
-    try:
-        response_json = json.loads(response_text)
-    except:
-        # Fallback if JSON parsing fails
-        response_json = {
-            "generated_description": response_text,
-            "generated_responsibilities": [],
-            "generated_qualifications": []
-        }
+        try:
+            response_json = json.loads(response_text)
+        except:
+            # Fallback if JSON parsing fails
+            response_json = {
+                "generated_description": response_text,
+                "generated_responsibilities": [],
+                "generated_qualifications": []
+            }
+
+        return response_json, 200
 
-    return jsonify(response_json)
+    return _run_or_enqueue('generate_jd', run, get_current_user())
 
 @genai_bp.route('/gen-ai/generate-cover-letter', methods=['POST'])
 def generate_cover_letter():
@@ -175,7 +342,7 @@ def generate_cover_letter():
     4. The tone should be professional and enthusiastic.
     """
 
-    draft = llm_service.generate_text(system_prompt, user_prompt)
+    draft = llm_service.generate_text(system_prompt, user_prompt, task='cover_letter')
 
     return jsonify({
         'generated_draft': draft
@@ -197,26 +364,29 @@ def generate_interview_guide():
 
     user_prompt = f"JD: {jd_text}"
 
-    response_text = llm_service.generate_text(system_prompt, user_prompt)
+    def run():
+        response_text = llm_service.generate_text(system_prompt, user_prompt, task='interview_guide')
 
-    # Clean up markdown if Gemini adds it despite instructions
-    if response_text.startswith("```json"):
-        response_text = response_text.replace("```json", "").replace("```", "")
-    elif response_text.startswith("```"):
-        response_text = response_text.replace("```", "")
+        # Clean up markdown if Gemini adds it despite instructions
+        if response_text.startswith("```json"):
+            response_text = response_text.replace("```json", "").replace("```", "")
+        elif response_text.startswith("```"):
+            response_text = response_text.replace("```", "")
 
-    try:
-        response_json = json.loads(response_text)
-    except:
-         # Fallback: puts text in rubric if parsing fails, but prevents crash
-         response_json = {
-            "job_title": "Role",
-            "behavioral_questions": [],
-            "technical_questions": [],
-            "scoring_rubric": response_text
-        }
+        try:
+            response_json = json.loads(response_text)
+        except:
+             # Fallback: puts text in rubric if parsing fails, but prevents crash
+             response_json = {
+                "job_title": "Role",
+                "behavioral_questions": [],
+                "technical_questions": [],
+                "scoring_rubric": response_text
+            }
 
-    return jsonify(response_json)
+        return response_json, 200
+
+    return _run_or_enqueue('generate_interview_guide', run, get_current_user())
 
 @genai_bp.route('/gen-ai/summarize-feedback', methods=['POST'])
 def summarize_feedback():
@@ -234,26 +404,29 @@ def summarize_feedback():
 
     user_prompt = f"Notes:\n{notes}"
 
-    response_text = llm_service.generate_text(system_prompt, user_prompt)
+    def run():
+        response_text = llm_service.generate_text(system_prompt, user_prompt, task='feedback_summary')
 
-    # Clean up markdown if Gemini adds it despite instructions
-    if response_text.startswith("```json"):
-        response_text = response_text.replace("```json", "").replace("```", "")
-    elif response_text.startswith("```"):
-        response_text = response_text.replace("```", "")
+        # Clean up markdown if Gemini adds it despite instructions
+        if response_text.startswith("```json"):
+            response_text = response_text.replace("```json", "").replace("```", "")
+        elif response_text.startswith("```"):
+            response_text = response_text.replace("```", "")
 
-    try:
-        response_json = json.loads(response_text)
-    except:
-        # Fallback: put text in summary if parsing fails
-        response_json = {
-            "summary": response_text,
-            "strengths": ["Could not parse strengths."],
-            "weaknesses": ["Could not parse weaknesses."],
-            "recommendation": "Needs Discussion"
-        }
+        try:
+            response_json = json.loads(response_text)
+        except:
+            # Fallback: put text in summary if parsing fails
+            response_json = {
+                "summary": response_text,
+                "strengths": ["Could not parse strengths."],
+                "weaknesses": ["Could not parse weaknesses."],
+                "recommendation": "Needs Discussion"
+            }
 
-    return jsonify(response_json)
+        return response_json, 200
+
+    return _run_or_enqueue('summarize_feedback', run, get_current_user())
 
 # --- NEW: Mock Interview Endpoints ---
 
@@ -275,9 +448,10 @@ def start_mock_interview():
     - Output strict JSON: A simple list of strings. ["Question 1", "Question 2", ...]
     - Do not include markdown formatting."""
     
-    user_prompt = f"Role: {job.title}\nCompany: {job.company}\nDescription: {job.description[:500]}..."
+    description = PromptBuilder('mock_interview_questions').add('description', job.description).build()['description']
+    user_prompt = f"Role: {job.title}\nCompany: {job.company}\nDescription: {description}"
 
-    response_text = llm_service.generate_text(system_prompt, user_prompt)
+    response_text = llm_service.generate_text(system_prompt, user_prompt, task='mock_interview_questions')
     
     # Cleanup & Parse
     if response_text.startswith("```json"):
@@ -334,19 +508,22 @@ def submit_mock_interview():
 
     user_prompt = f"Job: {job.title}\n\nInterview Transcript:\n{transcript_text}"
 
-    response_text = llm_service.generate_text(system_prompt, user_prompt)
+    def run():
+        response_text = llm_service.generate_text(system_prompt, user_prompt, task='mock_interview_evaluation')
 
-    # Cleanup & Parse
-    if response_text.startswith("```json"):
-        response_text = response_text.replace("```json", "").replace("```", "")
-    elif response_text.startswith("```"):
-        response_text = response_text.replace("```", "")
+        # Cleanup & Parse
+        if response_text.startswith("```json"):
+            response_text = response_text.replace("```json", "").replace("```", "")
+        elif response_text.startswith("```"):
+            response_text = response_text.replace("```", "")
 
-    try:
-        evaluation = json.loads(response_text)
-        return jsonify(evaluation)
-    except:
-        return jsonify({'error': 'Failed to generate evaluation'}), 500
+        try:
+            evaluation = json.loads(response_text)
+            return evaluation, 200
+        except:
+            return {'error': 'Failed to generate evaluation'}, 500
+
+    return _run_or_enqueue('submit_mock_interview', run, user)
 
 @genai_bp.route('/gen-ai/performance-insights', methods=['POST'])
 def generate_performance_insights():
@@ -385,9 +562,7 @@ def generate_performance_insights():
             sorted_reviews = sorted(emp.performances, key=lambda x: x.date, reverse=True)
             for p in sorted_reviews[:2]:
                 if p.comments:
-                    recent_comments.append(f"[{emp.department}] {p.comments}")
-
-    recent_comments = recent_comments[:15]
+                    recent_comments.append((p.date, f"[{emp.department}] {p.comments}"))
 
     # 3. Construct Context
     dept_summary = ", ".join([
@@ -397,11 +572,17 @@ def generate_performance_insights():
     
     global_avg = round(total_rating / rating_count, 1) if rating_count else 0
 
+    # Newest first, as many distinct comments as the prompt budget allows, the rest summarized
+    recent_comments = [comment for _, comment in sorted(recent_comments, key=lambda c: c[0], reverse=True)]
+    review_sample = PromptBuilder('performance_insights') \
+        .add_items('comments', recent_comments, noun='more comments') \
+        .build()['comments']
+
     stats_context = f"""
     Global Average Rating: {global_avg}/5.0
     Department Averages: {dept_summary}
     Recent Review Sample:
-    {chr(10).join(recent_comments)}
+    {review_sample}
     """
 
     # --- UPDATED PROMPT: Enforce 1 of each type ---
@@ -424,19 +605,22 @@ def generate_performance_insights():
     
     user_prompt = f"Performance Data Analysis:\n{stats_context}"
 
-    # 4. Call AI
-    response_text = llm_service.generate_text(system_prompt, user_prompt)
-
-    if response_text.startswith("```json"):
-        response_text = response_text.replace("```json", "").replace("```", "")
-    elif response_text.startswith("```"):
-        response_text = response_text.replace("```", "")
-
-    try:
-        insights = json.loads(response_text)
-        return jsonify(insights)
-    except Exception as e:
-        print(f"Insight Generation Error: {e}")
-        return jsonify([
-            {"title": "Analysis Error", "detail": "Could not generate insights.", "type": "info"}
-        ])
\ No newline at end of file
+    def run():
+        # 4. Call AI
+        response_text = llm_service.generate_text(system_prompt, user_prompt, task='performance_insights')
+
+        if response_text.startswith("```json"):
+            response_text = response_text.replace("```json", "").replace("```", "")
+        elif response_text.startswith("```"):
+            response_text = response_text.replace("```", "")
+
+        try:
+            insights = json.loads(response_text)
+            return insights, 200
+        except Exception as e:
+            print(f"Insight Generation Error: {e}")
+            return [
+                {"title": "Analysis Error", "detail": "Could not generate insights.", "type": "info"}
+            ], 200
+
+    return _run_or_enqueue('performance_insights', run, user)
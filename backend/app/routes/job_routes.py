@@ -1,168 +1,269 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import or_, and_
+from ..config import Config
 from ..database import db
-from ..models import Job
+from ..models import Job, Profile, User, Application
 from ..utils import get_current_user
 from ..services.matching_service import matching_service
+from ..services.rescoring_service import rescoring_service
+from ..services.task_queue import task_queue
+from ..services.job_search import job_search, FACETS
+from ..services.application_counts import application_counts
+from ..serializers import job_serializer, wants
+from ..services.lru_cache import LRUCache
+from datetime import datetime
+import base64
 import json
+import math
 
 job_bp = Blueprint('job_bp', __name__)
 
+_job_count_cache = LRUCache(maxsize=1, ttl=Config.JOBS_COUNT_TTL)
+
+def _refresh_job_features(job):
+    # Precompute matching features alongside the job write so listings don't re-parse it
+    try:
+        matching_service.refresh_job_features(job)
+    except Exception as e:
+        print(f"Error computing features for job {job.id}: {e}")
+
+def _index_job(job):
+    # Keep the lemma -> jobs inverted index current for recommendation candidates
+    try:
+        matching_service.index_job(job)
+    except Exception as e:
+        print(f"Error indexing job {job.id}: {e}")
+
 # --- Job Seeker - Jobs Endpoints ---
 
+def _job_count():
+    # Exact COUNT(*) reused for a few seconds; listings don't need a to-the-row total on every page
+    total = _job_count_cache.get('jobs')
+    if total is None:
+        total = Job.query.count()
+        _job_count_cache.set('jobs', total)
+    return total
+
+def _encode_cursor(job):
+    payload = json.dumps([job.created_at.isoformat() if job.created_at else None, job.id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor):
+    """(created_at or None, id) from a listing cursor; ValueError when it is malformed."""
+    payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    if not isinstance(payload, list) or len(payload) != 2:
+        raise ValueError('cursor must be [created_at, id]')
+    created_at, job_id = payload
+    if created_at is not None and not isinstance(created_at, str):
+        raise ValueError('cursor created_at must be a string or null')
+    if isinstance(job_id, bool) or not isinstance(job_id, int):
+        raise ValueError('cursor id must be an integer')
+    return (datetime.fromisoformat(created_at) if created_at is not None else None), job_id
+
+def _after_cursor(created_at, job_id):
+    """
+    Rows strictly after (created_at, id) in created_at DESC NULLS LAST, id DESC order.
+    Jobs without a created_at sort after every dated job, so a dated cursor still
+    leaves all of them to come and a NULL cursor only walks the remaining NULL rows.
+    """
+    if created_at is None:
+        return and_(Job.created_at.is_(None), Job.id < job_id)
+    return or_(
+        Job.created_at < created_at,
+        and_(Job.created_at == created_at, Job.id < job_id),
+        Job.created_at.is_(None)
+    )
+
+def _encode_rank_cursor(score, job_id):
+    payload = json.dumps({'score': score, 'id': job_id})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def _decode_rank_cursor(cursor):
+    payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    if not isinstance(payload, dict):
+        raise ValueError('cursor must be an object')
+    score, job_id = float(payload['score']), payload['id']
+    if not math.isfinite(score):
+        raise ValueError('cursor score must be finite')
+    if isinstance(job_id, bool) or not isinstance(job_id, int):
+        raise ValueError('cursor id must be an integer')
+    return score, job_id
+
+def _ranked_page(profile, limit, after, offset):
+    """
+    One page of (job, score) pairs over the whole catalog, best match first (ties newest first),
+    whether more follow and the cursor of the next page; None when scoring is unavailable.
+    Ranking reads the in-memory job matrix, so only the page's job rows are loaded.
+    """
+    ranked = matching_service.rank_jobs(profile, limit=limit, after=after, offset=offset)
+    if ranked is None:
+        return None
+    page, has_more, last = ranked
+    jobs_by_id = {job.id: job for job in Job.query.filter(Job.id.in_([job_id for job_id, _ in page]))} if page else {}
+    scored = [(jobs_by_id[job_id], score) for job_id, score in page if job_id in jobs_by_id]
+    next_cursor = _encode_rank_cursor(*last) if has_more else None
+    return scored, has_more, next_cursor
+
+def _page_size():
+    limit = request.args.get('limit', current_app.config.get('JOBS_PAGE_SIZE', 20), type=int)
+    return min(max(limit, 1), current_app.config.get('JOBS_MAX_PAGE_SIZE', 100))
+
 @job_bp.route('/jobs', methods=['GET'])
 def get_jobs():
-    # Helper for pagination
-    page = request.args.get('page', 1, type=int)
-    limit_param = request.args.get('limit', type=int)
-
-    jobs = Job.query.all() 
-
-    if limit_param:
-        limit = limit_param
-        start = (page - 1) * limit
-        end = start + limit
-        paginated_jobs = jobs[start:end]
-        total_pages = (len(jobs) + limit - 1) // limit
-    else:
-        # Show all jobs if no limit provided
-        paginated_jobs = jobs
-        limit = len(jobs)
-        total_pages = 1
+    # Logged-in candidates get the whole catalog ranked by match score (?sort=newest opts out);
+    # everyone else reads newest first with a keyset cursor on (created_at, id)
+    limit = _page_size()
+    cursor = request.args.get('cursor')
+    page = max(request.args.get('page', 1, type=int), 1)
 
     # Check for authenticated user to calculate match score
     user = get_current_user()
     profile = user.profile if user else None
-
-    job_list = []
-    for job in paginated_jobs:
-        job_data = {
-            'id': job.id,
-            'title': job.title,
-            'company': job.company,
-            'department': job.department,
-            'description': job.description,
-            'location': job.location,
-            'type': job.type,
-            'remote_option': job.remote_option,
-            'salary': job.salary, 
-            'experience_level': job.experience_level,
-            'education': job.education,
-            'benefits': job.benefits,
-            'application_deadline': job.application_deadline,
-            'tags': job.tags.split(',') if job.tags else [],
-            'created_at': job.created_at,
-            'company_logo_url': getattr(job, 'company_logo_url', ''),
-            'applications_count': len(job.applications)
-        }
-
-        # Calculate AI Match Score if user profile exists
-        if profile:
+    ranked = profile is not None and request.args.get('sort') != 'newest'
+
+    ranked_page = None
+    if ranked:
+        try:
+            after = _decode_rank_cursor(cursor) if cursor else None
+        except (ValueError, TypeError, KeyError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        # Legacy ?page=N becomes an offset into the ranking
+        ranked_page = _ranked_page(profile, limit, after, 0 if cursor else (page - 1) * limit)
+        # Scoring unavailable: fall back to the newest-first listing
+        ranked = ranked_page is not None
+        if not ranked:
+            cursor = None
+
+    if ranked:
+        scored, has_more, next_cursor = ranked_page
+        paginated_jobs = [job for job, _ in scored]
+    else:
+        query = Job.query.order_by(Job.created_at.desc().nulls_last(), Job.id.desc())
+        if cursor:
             try:
-                score = matching_service.calculate_score(profile, job)
-                job_data['match_score'] = score
-            except Exception as e:
-                print(f"Error calculating score for job {job.id}: {e}")
-                job_data['match_score'] = 0
+                created_at, job_id = _decode_cursor(cursor)
+            except (ValueError, TypeError, KeyError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(_after_cursor(created_at, job_id))
+        elif page > 1:
+            # Legacy ?page=N, still answered by the database
+            query = query.offset((page - 1) * limit)
+
+        # One extra row tells whether there is a next page
+        rows = query.limit(limit + 1).all()
+        paginated_jobs = rows[:limit]
+        has_more = len(rows) > limit
+        next_cursor = _encode_cursor(paginated_jobs[-1]) if has_more else None
 
-        job_list.append(job_data)
+        # Score the page in one batched pass; it stays newest first
+        scores = (matching_service.score_many(profile, paginated_jobs) if profile else None) or [None] * len(paginated_jobs)
+        scored = list(zip(paginated_jobs, scores))
 
-    # Sort by match score if user is logged in
-    if profile:
-        job_list.sort(key=lambda x: x.get('match_score', 0), reverse=True)
+    total = _job_count()
+
+    fields = job_serializer.selected()
+
+    # Application counts for the whole page from the maintained counters
+    counts = application_counts.for_jobs([job.id for job in paginated_jobs]) if wants(fields, 'applications_count') else {}
+
+    job_list = []
+    for job, score in scored:
+        extra = {'applications_count': counts[job.id]['total']} if counts else {}
+        # Attach AI Match Score if user profile exists
+        if profile:
+            extra['match_score'] = score
+        job_list.append(job_serializer.dump(job, fields, **extra))
 
     return jsonify({
         'pagination': {
-            'page': page,
-            'per_page': limit if limit else len(jobs),
-            'total_items': len(jobs),
-            'total_pages': total_pages
+            'page': None if cursor else page,
+            'per_page': limit,
+            'total_items': total,
+            'total_pages': (total + limit - 1) // limit,
+            'has_more': has_more,
+            'next_cursor': next_cursor,
+            'sort': 'match' if ranked else 'newest'
         },
         'jobs': job_list
     })
 
 @job_bp.route('/jobs/search', methods=['GET'])
 def search_jobs():
-    q = request.args.get('q', '').lower()
-    location = request.args.get('location', '').lower()
-    
-    all_jobs = Job.query.all()
-    filtered = []
-    
+    # Matching, relevance ranking, filters, facet counts and paging happen in the database;
+    # the match-score order ranks the hit ids against the in-memory job matrix
+    q = request.args.get('q', '')
+    location = request.args.get('location', '')
+    limit = _page_size()
+    page = max(request.args.get('page', 1, type=int), 1)
+    with_facets = request.args.get('facets', '1') != '0'
+
+    # ?type=Full-time&type=Contract or ?type=Full-time,Contract
+    filters = {}
+    for facet in FACETS:
+        values = [value.strip() for arg in request.args.getlist(facet) for value in arg.split(',') if value.strip()]
+        if values and facet != 'location':
+            filters[facet] = values
+    # ?min_salary=500000&max_salary=1500000
+    salary = {'min_salary': request.args.get('min_salary', type=int), 'max_salary': request.args.get('max_salary', type=int)}
+
     # Check for authenticated user
     user = get_current_user()
     profile = user.profile if user else None
 
-    for job in all_jobs:
-        match = True
-        if q:
-            text = (job.title + job.description + (job.tags or '')).lower()
-            if q not in text:
-                match = False
-        if location:
-            if location not in (job.location or '').lower():
-                match = False
+    # Candidates get the hits ranked by match score across all pages by default;
+    # ?sort=relevance (and anonymous users) keep the search ranking
+    sort = 'match' if profile and request.args.get('sort', 'match') == 'match' else 'relevance'
+    offset = (page - 1) * limit
+
+    fields = job_serializer.selected()
+    if sort == 'match':
+        total, hit_ids, facets = job_search.search(q, location, filters, limit=None, facets=with_facets, **salary)
+        ranked = matching_service.rank_jobs(profile, limit=limit, offset=offset, job_ids=hit_ids) if hit_ids else ([], False, None)
+        if ranked is not None:
+            job_ids = [job_id for job_id, _ in ranked[0]]
+            scores = dict(ranked[0])
+        else:
+            # Scoring unavailable: the hits are already in relevance order
+            sort = 'relevance'
+            job_ids = hit_ids[offset:offset + limit]
+    else:
+        total, job_ids, facets = job_search.search(
+            q, location, filters, limit=limit, offset=offset, facets=with_facets, **salary
+        )
 
-        if match:
-            filtered.append(job)
+    jobs_by_id = {job.id: job for job in Job.query.filter(Job.id.in_(job_ids)).all()} if job_ids else {}
+    page_jobs = [jobs_by_id[job_id] for job_id in job_ids if job_id in jobs_by_id]
 
-    job_list = []
-    for job in filtered:
-        job_data = {
-            'title': job.title,
-            'company': job.company,
-            'department': job.department,
-            'description': job.description,
-            'location': job.location,
-            'type': job.type,
-            'remote_option': job.remote_option,
-            'salary': job.salary, 
-            'experience_level': job.experience_level,
-            'education': job.education,
-            'benefits': job.benefits,
-            'application_deadline': job.application_deadline,
-            'tags': job.tags.split(',') if job.tags else [],
-            'created_at': job.created_at,
-            'id': job.id
-        }
-        
-        if profile:
-            try:
-                score = matching_service.calculate_score(profile, job)
-                job_data['match_score'] = score
-            except:
-                job_data['match_score'] = 0
-        
-        job_list.append(job_data)
+    if sort == 'match':
+        scored = [(job, scores[job.id]) for job in page_jobs]
+    else:
+        page_scores = (matching_service.score_many(profile, page_jobs) if profile else None) or [None] * len(page_jobs)
+        scored = list(zip(page_jobs, page_scores))
 
-    # Sort by match score
-    if profile:
-        job_list.sort(key=lambda x: x.get('match_score', 0), reverse=True)
+    job_list = [
+        job_serializer.dump(job, fields, **({'match_score': score} if profile else {}))
+        for job, score in scored
+    ]
 
-    return jsonify({
-        'pagination': {'total_items': len(job_list)},
+    response = {
+        'pagination': {
+            'page': page,
+            'per_page': limit,
+            'total_items': total,
+            'total_pages': (total + limit - 1) // limit,
+            'has_more': page * limit < total,
+            'sort': sort
+        },
         'jobs': job_list
-    })
+    }
+    if facets is not None:
+        response['facets'] = facets
+    return jsonify(response)
 
 @job_bp.route('/jobs/<int:job_id>', methods=['GET'])
 def get_job(job_id):
     job = Job.query.get_or_404(job_id)
-    return jsonify({
-        'id': job.id,
-        'title': job.title,
-        'company': job.company,
-        'department': job.department,
-        'description': job.description,
-        'location': job.location,
-        'type': job.type,
-        'remote_option': job.remote_option,
-        'salary': job.salary, 
-        'experience_level': job.experience_level,
-        'education': job.education,
-        'benefits': job.benefits,
-        'application_deadline': job.application_deadline,
-        'tags': job.tags.split(',') if job.tags else [],
-        'created_at': job.created_at,
-    })
+    return jsonify(job_serializer.dump(job, job_serializer.selected()))
 
 # --- HR - Jobs Endpoints ---
 
@@ -175,27 +276,18 @@ def get_my_jobs():
     # Fetch jobs posted by this user
     jobs = Job.query.filter_by(posted_by=user.id).all()
 
-    job_list = [{
-        'id': job.id,
-        'title': job.title,
-        'company': job.company,
-        'department': job.department,
-        'description': job.description,
-        'location': job.location,
-        'type': job.type,
-        'remote_option': job.remote_option,
-        'salary': job.salary, 
-        'experience_level': job.experience_level,
-        'education': job.education,
-        'benefits': job.benefits,
-        'application_deadline': job.application_deadline,
-        'tags': job.tags.split(',') if job.tags else [],
-        'created_at': job.created_at,
-        'company_logo_url': getattr(job, 'company_logo_url', ''),
-        'applications_count': len(job.applications),
-        'qualified_count': len([app for app in job.applications if (app.match_score or 0) >= 80]),
-        'status': getattr(job, 'status', 'Open')
-    } for job in jobs]
+    fields = job_serializer.selected()
+    with_counts = any(wants(fields, name) for name in ('applications_count', 'qualified_count', 'applications_by_status'))
+    counts = application_counts.for_jobs([job.id for job in jobs]) if with_counts else {}
+
+    job_list = []
+    for job in jobs:
+        extra = {
+            'applications_count': counts[job.id]['total'],
+            'qualified_count': counts[job.id]['qualified'],
+            'applications_by_status': counts[job.id]['by_status'],
+        } if counts else {}
+        job_list.append(job_serializer.dump(job, fields, status=getattr(job, 'status', 'Open'), **extra))
 
     return jsonify({'jobs': job_list})
 
@@ -224,7 +316,10 @@ def create_job():
         posted_by=user.id  # Assign to current user
     )
     db.session.add(job)
+    _refresh_job_features(job)
     db.session.commit()
+    _index_job(job)
+    _job_count_cache.pop('jobs')
     return jsonify({'message': 'Job created successfully', 'id': job.id}), 201
 
 @job_bp.route('/hr/jobs/<int:job_id>', methods=['PUT'])
@@ -232,6 +327,8 @@ def update_job(job_id):
     # TODO: Auth Check (HR Role + Ownership)
     job = Job.query.get_or_404(job_id)
     data = request.json
+    # Existing applications were scored against the old text
+    matching_changed = any(field in data and data[field] != getattr(job, field) for field in ('title', 'tags', 'description'))
 
     if 'title' in data: job.title = data['title']
     if 'description' in data: job.description = data['description']
@@ -247,7 +344,12 @@ def update_job(job_id):
     if 'benefits' in data: job.benefits = data['benefits']
     if 'application_deadline' in data: job.application_deadline = data['application_deadline']
 
+    _refresh_job_features(job)
     db.session.commit()
+    _index_job(job)
+
+    if matching_changed:
+        rescoring_service.enqueue_job(job.id)
     return jsonify({'message': 'Job updated successfully'})
 
 @job_bp.route('/hr/jobs/<int:job_id>', methods=['DELETE'])
@@ -256,8 +358,84 @@ def delete_job(job_id):
     job = Job.query.get_or_404(job_id)
     db.session.delete(job)
     db.session.commit()
+    matching_service.forget_job(job_id)
+    _job_count_cache.pop('jobs')
     return jsonify({'message': 'Job deleted successfully'})
 
+@job_bp.route('/hr/jobs/<int:job_id>/top-candidates', methods=['GET'])
+def get_top_candidates(job_id):
+    user = get_current_user()
+    if not user or user.role != 'hr':
+        return jsonify({'error': 'Unauthorized: HR role required'}), 403
+
+    job = Job.query.get_or_404(job_id)
+    page = max(request.args.get('page', 1, type=int), 1)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+
+    # Scores the whole candidate pool against this job in one batched pass
+    total, ranked, pending = matching_service.rank_profiles(job, limit=limit, offset=(page - 1) * limit)
+
+    profile_ids = [profile_id for profile_id, _ in ranked]
+    rows = db.session.query(Profile.id, Profile.location, User.id, User.first_name, User.last_name, User.email) \
+        .join(User, Profile.user_id == User.id) \
+        .filter(Profile.id.in_(profile_ids)).all() if profile_ids else []
+    people = {row[0]: row for row in rows}
+    applied = {
+        user_id for (user_id,) in db.session.query(Application.user_id)
+        .filter(Application.job_id == job.id, Application.user_id.in_([row[2] for row in rows])).all()
+    } if rows else set()
+
+    candidates = []
+    for profile_id, score in ranked:
+        person = people.get(profile_id)
+        if not person:
+            continue
+        _, location, candidate_id, first_name, last_name, email = person
+        candidates.append({
+            'profile_id': profile_id,
+            'user_id': candidate_id,
+            'candidate_name': f"{first_name} {last_name}",
+            'email': email,
+            'location': location,
+            'match_score': score,
+            'has_applied': candidate_id in applied
+        })
+
+    return jsonify({
+        'job_id': job.id,
+        'pagination': {
+            'page': page,
+            'per_page': limit,
+            'total_items': total,
+            'total_pages': (total + limit - 1) // limit
+        },
+        # Candidates still being parsed in the background are not ranked yet
+        'pending_candidates': pending,
+        'candidates': candidates
+    })
+
+@job_bp.route('/hr/jobs/<int:job_id>/explanations', methods=['POST'])
+def generate_job_explanations(job_id):
+    user = get_current_user()
+    if not user or user.role != 'hr':
+        return jsonify({'error': 'Unauthorized: HR role required'}), 403
+
+    job = Job.query.get_or_404(job_id)
+    overwrite = bool((request.get_json(silent=True) or {}).get('overwrite', False))
+
+    job_id = job.id
+
+    def run():
+        # Pre-warms the explanations of the whole applicant pool with batched LLM calls
+        generated = matching_service.explain_applications(Job.query.get(job_id), overwrite=overwrite)
+        return {'job_id': job_id, 'generated': generated}, 200
+
+    # Many LLM round-trips for a large pool: always on the task queue, poll /api/tasks/<id>
+    task = task_queue.submit('job_explanations', run, user_id=user.id)
+    if task is None:
+        return jsonify({'error': 'Too many pending tasks, try again later'}), 503
+    return jsonify({'task_id': task.id, 'status': task.status}), 202, {'Location': f'/api/tasks/{task.id}'}
+
 @job_bp.route('/jobs/recommendations', methods=['GET'])
 def get_job_recommendations():
     user = get_current_user()
@@ -268,37 +446,20 @@ def get_job_recommendations():
     if not profile:
         return jsonify({'error': 'Profile required for recommendations'}), 400
 
-    jobs = Job.query.all()
-    recommended = []
+    # Jobs under the keyword penalty (keyword_score < 0.2) are capped near 19% and can never
+    # pass the threshold, so only the inverted-index candidates above it need to be loaded.
+    candidate_ids = matching_service.candidate_job_ids(profile, min_keyword_score=0.2)
+    jobs = Job.query.filter(Job.id.in_(candidate_ids)).order_by(Job.id).all() if candidate_ids else []
+
+    # Top 5 with score > 70% (Lowered threshold slightly to ensure results).
+    # Jobs whose keyword overlap can't reach the current top 5 are never fully scored.
+    top_jobs = matching_service.top_k(profile, jobs, k=5, min_score=70)
+
+    fields = job_serializer.selected()
+    recommended = [job_serializer.dump(job, fields, match_score=score) for job, score in top_jobs]
 
-    for job in jobs:
-        # Calculate score locally (fast)
-        score = matching_service.calculate_score(profile, job)
-        
-        # Only recommend if score > 70% (Lowered threshold slightly to ensure results)
-        if score > 70: 
-            job_data = {
-                'id': job.id,
-                'title': job.title,
-                'company': job.company,
-                'location': job.location,
-                'type': job.type,
-                'salary': job.salary,
-                'description': job.description,
-                'experience_level': job.experience_level,
-                'education': job.education,
-                'remote_option': job.remote_option,
-                'benefits': job.benefits,
-                'tags': job.tags.split(',') if job.tags else [],
-                'match_score': score
-            }
-            recommended.append(job_data)
-
-    # Sort by score descending
-    recommended.sort(key=lambda x: x['match_score'], reverse=True)
-    
     return jsonify({
-        'jobs': recommended[:5] # Return top 5
+        'jobs': recommended # Already sorted, top 5
     })
 
 # Add this endpoint to get explanation for a specific job without applying
@@ -311,7 +472,7 @@ def get_job_match_analysis(job_id):
     profile = user.profile
     
     score = matching_service.calculate_score(profile, job)
-    explanation_json = matching_service.generate_explanation(profile, job, score)
+    explanation_json = matching_service.explain(profile, job, score)
     
     return jsonify({
         'match_score': score,
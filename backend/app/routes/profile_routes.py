@@ -3,6 +3,9 @@ from flask import current_app, Blueprint, request, jsonify, g
 from ..database import db
 from ..models import Profile, Experience, Education, User
 from ..utils import get_current_user
+from ..services.matching_service import matching_service
+from ..services.rescoring_service import rescoring_service
+from ..serializers import profile_serializer, PUBLIC_PROFILE_FIELDS, wants
 
 profile_bp = Blueprint('profile_bp', __name__)
 
@@ -20,28 +23,13 @@ def profile_me():
         return jsonify({'error': 'Profile not found'}), 404
 
     if request.method == 'GET':
-        return jsonify({
-            'id': profile.id,
-            'user_id': profile.user_id,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'full_name': f"{user.first_name} {user.last_name}",
-            'email': user.email,
-            'role': user.role,
-            'phone': profile.phone,
-            'location': profile.location,
-            'summary': profile.summary,
-            'profile_pic': profile.profile_pic, 
-            'profile_pic_url': profile.profile_pic, 
-            'resume_url': profile.resume, 
-            'resume': profile.resume,
-            'linkedin_profile': getattr(profile, 'linkedin_profile', ''),
-            'github_profile': getattr(profile, 'github_profile', ''),
-            'portfolio_url': getattr(profile, 'portfolio_url', ''),
-            'skills': getattr(profile, 'skills', []),
-            'completeness': profile.completeness,
-            'views': profile.views or 0,  # Include view count
-            'experiences': [
+        fields = profile_serializer.selected()
+        return jsonify(profile_serializer.dump(
+            profile, fields,
+            profile_pic=profile.profile_pic,
+            resume=profile.resume,
+            skills=getattr(profile, 'skills', []),
+            experiences=[
                 {
                     'id': e.id,
                     'title': e.title,
@@ -52,8 +40,8 @@ def profile_me():
                     'description': e.description,
                     'location': getattr(e, 'location', '')
                 } for e in profile.experiences
-            ],
-            'educations': [
+            ] if wants(fields, 'experiences') else [],
+            educations=[
                 {
                     'id': e.id,
                     'degree': e.degree,
@@ -62,8 +50,8 @@ def profile_me():
                     'end_date': e.end_date,
                     'description': e.description
                 } for e in profile.educations
-            ]
-        })
+            ] if wants(fields, 'educations') else []
+        ))
 
     # PUT: update profile fields
     data = request.json or {}
@@ -76,14 +64,21 @@ def profile_me():
     if 'company_name' in data:
         user.company_name = data['company_name']
 
+    # Of these fields only the summary feeds matching (see MatchingService._construct_profile_text)
+    matching_changed = 'summary' in data and data['summary'] != profile.summary
+
     for field in allowed_fields:
         if field in data:
             if hasattr(profile, field):
                 setattr(profile, field, data[field])
 
     profile.calculate_completeness()
+    if matching_changed:
+        matching_service.bump_profile_version(profile)
 
     db.session.commit()
+    if matching_changed:
+        rescoring_service.enqueue_profile(profile)
     return jsonify({'message': 'Profile updated successfully', 'completeness': profile.completeness})
 
 
@@ -161,7 +156,9 @@ def add_my_experience():
     db.session.add(e)
     db.session.flush()
     profile.calculate_completeness()
+    matching_service.bump_profile_version(profile)
     db.session.commit()
+    rescoring_service.enqueue_profile(profile)
     return jsonify({'message': 'Experience added', 'id': e.id}), 201
 
 @profile_bp.route('/profiles/me/experiences/<int:exp_id>', methods=['PUT'])
@@ -176,6 +173,8 @@ def update_my_experience(exp_id):
         return jsonify({'error': 'Forbidden'}), 403
 
     data = request.json
+    # Titles and descriptions feed matching; company and dates don't
+    matching_changed = data.get('title', e.title) != e.title or data.get('description', e.description) != e.description
     e.title = data.get('title', e.title)
     e.company = data.get('company', e.company)
     e.start_date = data.get('start_date', e.start_date)
@@ -183,7 +182,11 @@ def update_my_experience(exp_id):
     e.description = data.get('description', e.description)
 
     profile.calculate_completeness()
+    if matching_changed:
+        matching_service.bump_profile_version(profile)
     db.session.commit()
+    if matching_changed:
+        rescoring_service.enqueue_profile(profile)
     return jsonify({'message': 'Experience updated'})
 
 @profile_bp.route('/profiles/me/experiences/<int:exp_id>', methods=['DELETE'])
@@ -200,7 +203,9 @@ def delete_my_experience(exp_id):
     db.session.delete(e)
     db.session.flush()
     profile.calculate_completeness()
+    matching_service.bump_profile_version(profile)
     db.session.commit()
+    rescoring_service.enqueue_profile(profile)
     return jsonify({'message': 'Experience deleted'})
 
 @profile_bp.route('/profiles/me/education', methods=['POST'])
@@ -221,6 +226,7 @@ def add_education():
     )
     db.session.add(edu)
     db.session.flush()
+    # Educations are not part of the matching text: features and scores stay valid
     profile.calculate_completeness()
     db.session.commit()
     return jsonify({'message': 'Education added', 'id': edu.id}), 201
@@ -237,6 +243,7 @@ def delete_education(edu_id):
 
     db.session.delete(edu)
     db.session.flush()
+    # Educations are not part of the matching text: features and scores stay valid
     profile.calculate_completeness()
     db.session.commit()
     return jsonify({'message': 'Education deleted'})
@@ -259,33 +266,18 @@ def get_user_profile_hr(user_id):
         profile.views = (profile.views or 0) + 1
         db.session.commit()
 
-    return jsonify({
-        'id': profile.id,
-        'user_id': profile.user_id,
-        'first_name': target_user.first_name,
-        'last_name': target_user.last_name,
-        'full_name': f"{target_user.first_name} {target_user.last_name}",
-        'email': target_user.email,
-        'role': target_user.role,
-        'phone': profile.phone,
-        'location': profile.location,
-        'summary': profile.summary,
-        'profile_pic_url': profile.profile_pic,
-        'resume_url': profile.resume,
-        'completeness': profile.completeness,
-        'views': profile.views,
-        'experiences': [
-            {
-                'id': e.id,
-                'title': e.title,
-                'company': e.company,
-                'start_date': e.start_date,
-                'end_date': e.end_date,
-                'description': e.description,
-                'tags': []
-            } for e in profile.experiences
-        ]
-    })
+    fields = profile_serializer.selected()
+    return jsonify(profile_serializer.dump(profile, fields, experiences=[
+        {
+            'id': e.id,
+            'title': e.title,
+            'company': e.company,
+            'start_date': e.start_date,
+            'end_date': e.end_date,
+            'description': e.description,
+            'tags': []
+        } for e in profile.experiences
+    ] if wants(fields, 'experiences') else []))
 
 # --- Public Profile Endpoint ---
 @profile_bp.route('/public/profile/<int:user_id>', methods=['GET'])
@@ -304,21 +296,11 @@ def get_public_profile(user_id):
         profile.views = (profile.views or 0) + 1
         db.session.commit()
 
-    return jsonify({
-        'first_name': target_user.first_name,
-        'last_name': target_user.last_name,
-        'full_name': f"{target_user.first_name} {target_user.last_name}",
-        'email': target_user.email,
-        'role': target_user.role,
-        'location': profile.location,
-        'summary': profile.summary,
-        'profile_pic_url': profile.profile_pic,
-        'resume_url': profile.resume,
-        'linkedin_profile': getattr(profile, 'linkedin_profile', ''),
-        'github_profile': getattr(profile, 'github_profile', ''),
-        'portfolio_url': getattr(profile, 'portfolio_url', ''),
-        'completeness': profile.completeness,
-        'experiences': [
+    # Never more than the public fields, whatever ?fields= asks for; all of them if none of the asked ones is public
+    fields = PUBLIC_PROFILE_FIELDS & (profile_serializer.selected() or PUBLIC_PROFILE_FIELDS) or PUBLIC_PROFILE_FIELDS
+    return jsonify(profile_serializer.dump(
+        profile, fields,
+        experiences=[
             {
                 'id': e.id,
                 'title': e.title,
@@ -328,8 +310,8 @@ def get_public_profile(user_id):
                 'description': e.description,
                 'is_current': getattr(e, 'is_current', False)
             } for e in profile.experiences
-        ],
-        'educations': [
+        ] if 'experiences' in fields else [],
+        educations=[
             {
                 'id': e.id,
                 'degree': e.degree,
@@ -338,5 +320,5 @@ def get_public_profile(user_id):
                 'end_date': e.end_date,
                 'description': e.description
             } for e in profile.educations
-        ]
-    })
\ No newline at end of file
+        ] if 'educations' in fields else []
+    ))
@@ -0,0 +1,19 @@
+from flask import Blueprint, jsonify
+from ..models import Task
+from ..utils import get_current_user
+
+task_bp = Blueprint('task_bp', __name__)
+
+@task_bp.route('/tasks/<task_id>', methods=['GET'])
+def get_task(task_id):
+    task = Task.query.get(task_id)
+    if not task:
+        return jsonify({'error': 'Task not found'}), 404
+
+    # Tasks started by a signed-in user are only visible to that user
+    if task.user_id is not None:
+        user = get_current_user()
+        if not user or user.id != task.user_id:
+            return jsonify({'error': 'Task not found'}), 404
+
+    return jsonify(task.to_dict())
@@ -1,4 +1,7 @@
-from flask import Blueprint, jsonify, send_from_directory, current_app
+from flask import Blueprint, jsonify, send_from_directory, current_app, request, Response
+from ..services.llm_service import llm_service
+from ..services.semantic_cache import chat_answer_cache
+from ..utils import get_current_user
 import os
 
 utility_bp = Blueprint('utility_bp', __name__)
@@ -15,6 +18,25 @@ def get_system_status():
         'instance_id': current_app.config.get('SERVER_INSTANCE_ID')
     })
 
+@utility_bp.route('/metrics/llm', methods=['GET'])
+def get_llm_metrics():
+    """
+    Per-task LLM latency, size, token and outcome metrics. ?format=prometheus for the text exposition format.
+    """
+    user = get_current_user()
+    if not user or user.role != 'hr':
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    if request.args.get('format') == 'prometheus':
+        return Response(llm_service.metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+
+    metrics = llm_service.metrics.snapshot()
+    metrics['mode'] = llm_service.mode
+    metrics['cache'] = llm_service.cache.stats()
+    metrics['in_flight'] = llm_service.in_flight.in_flight()
+    metrics['semantic_cache'] = chat_answer_cache.stats()
+    return jsonify(metrics)
+
 @utility_bp.route('/uploads/<path:filename>', methods=['GET'])
 def get_uploaded_file(filename):
     upload_folder = os.path.join(current_app.root_path, 'uploads')
@@ -1,6 +1,8 @@
 from .database import db
 from .models import User, Profile, Job, Application, Employee, Performance, Education, Experience, Interview
 from .services.matching_service import matching_service
+from .services.job_search import job_search
+from .services.application_counts import application_counts
 from datetime import datetime, timedelta
 import random
 import csv
@@ -13,6 +15,8 @@ def seed_database():
     print("--- Clearing existing data ---")
     db.drop_all()
     db.create_all()
+    # The recreated jobs table comes without the full-text search triggers
+    job_search.ensure_index()
     print("--- Database cleared ---")
 
     print("--- Seeding with Rich Contextual Data ---")
@@ -716,6 +720,9 @@ At {company}, we foster a culture of innovation and collaboration. We believe in
 
     db.session.commit()
 
+    # Seeded applications bypass the routes that maintain the per-job counters
+    application_counts.reconcile()
+
     print("--- Database Seed Complete ---")
     print("DEMO CREDENTIALS:")
     print("  HR (Software/Data): hr1@gmail.com / 123")
@@ -0,0 +1,136 @@
+from flask import request
+
+def _attr(name, default=None):
+    return lambda obj: getattr(obj, name, default)
+
+def _csv(name):
+    return lambda obj: getattr(obj, name).split(',') if getattr(obj, name) else []
+
+class Serializer:
+    """
+    Model -> dict for API responses, with sparse fieldsets.
+
+    `fields` maps output names to getters, in output order. `extras` are names the routes compute
+    themselves (match scores, counts, nested lists) and pass to dump(); they can be selected with
+    ?fields= like any other field. ?view=compact selects the `compact` fields for list cards.
+    """
+    def __init__(self, fields, compact=(), extras=()):
+        self.fields = fields
+        self.compact = frozenset(compact)
+        self.names = frozenset(fields) | frozenset(extras)
+
+    def selected(self):
+        """
+        The fields the request asked for (?fields=a,b or ?view=compact), or None for all of them.
+        Unknown names are ignored; 'id' is always included.
+        """
+        raw = request.args.get('fields')
+        if raw:
+            fields = {name.strip() for name in raw.split(',')} & self.names
+            if 'id' in self.names:
+                fields.add('id')
+            return frozenset(fields)
+        if request.args.get('view') == 'compact':
+            return self.compact
+        return None
+
+    def dump(self, obj, fields=None, **extra):
+        data = {name: get(obj) for name, get in self.fields.items() if fields is None or name in fields}
+        for name, value in extra.items():
+            if fields is None or name in fields:
+                data[name] = value
+        return data
+
+def wants(fields, name):
+    """Whether a (possibly costly) field is part of the selection."""
+    return fields is None or name in fields
+
+job_serializer = Serializer(
+    fields={
+        'id': _attr('id'),
+        'title': _attr('title'),
+        'company': _attr('company'),
+        'department': _attr('department'),
+        'description': _attr('description'),
+        'location': _attr('location'),
+        'type': _attr('type'),
+        'remote_option': _attr('remote_option'),
+        'salary': _attr('salary'),
+        'experience_level': _attr('experience_level'),
+        'education': _attr('education'),
+        'benefits': _attr('benefits'),
+        'application_deadline': _attr('application_deadline'),
+        'tags': _csv('tags'),
+        'created_at': _attr('created_at'),
+        'company_logo_url': _attr('company_logo_url', ''),
+    },
+    compact=('id', 'title', 'company', 'location', 'type', 'remote_option', 'salary', 'tags', 'created_at',
+             'match_score', 'applications_count', 'qualified_count', 'status'),
+    extras=('match_score', 'applications_count', 'qualified_count', 'applications_by_status', 'status')
+)
+
+application_serializer = Serializer(
+    fields={
+        'id': _attr('id'),
+        'user_id': _attr('user_id'),
+        'job_id': _attr('job_id'),
+        'status': _attr('status'),
+        'applied_at': _attr('applied_at'),
+        'match_score': _attr('match_score'),
+    },
+    compact=('id', 'user_id', 'job_id', 'status', 'applied_at', 'match_score', 'candidate_name', 'job_title'),
+    extras=('candidate_name', 'job_title', 'match_analysis', 'interview_details')
+)
+
+profile_serializer = Serializer(
+    fields={
+        'id': _attr('id'),
+        'user_id': _attr('user_id'),
+        'first_name': lambda profile: profile.user.first_name,
+        'last_name': lambda profile: profile.user.last_name,
+        'full_name': lambda profile: f"{profile.user.first_name} {profile.user.last_name}",
+        'email': lambda profile: profile.user.email,
+        'role': lambda profile: profile.user.role,
+        'phone': _attr('phone'),
+        'location': _attr('location'),
+        'summary': _attr('summary'),
+        'profile_pic_url': _attr('profile_pic'),
+        'resume_url': _attr('resume'),
+        'linkedin_profile': _attr('linkedin_profile', ''),
+        'github_profile': _attr('github_profile', ''),
+        'portfolio_url': _attr('portfolio_url', ''),
+        'completeness': _attr('completeness'),
+        'views': lambda profile: profile.views or 0,
+    },
+    compact=('id', 'user_id', 'full_name', 'location', 'profile_pic_url', 'completeness'),
+    extras=('profile_pic', 'resume', 'skills', 'experiences', 'educations')
+)
+
+# What anyone may see on a shared profile link: no ids, phone or view count
+PUBLIC_PROFILE_FIELDS = frozenset((
+    'first_name', 'last_name', 'full_name', 'email', 'role', 'location', 'summary', 'profile_pic_url',
+    'resume_url', 'linkedin_profile', 'github_profile', 'portfolio_url', 'completeness',
+    'experiences', 'educations'
+))
+
+employee_serializer = Serializer(
+    fields={
+        'id': _attr('id'),
+        'user_id': _attr('user_id'),
+        'first_name': lambda e: e.user.first_name if e.user else "",
+        'last_name': lambda e: e.user.last_name if e.user else "",
+        'name': lambda e: f"{e.user.first_name} {e.user.last_name}" if e.user else "Unknown",
+        'email': lambda e: e.user.email if e.user else "",
+        'phone': lambda e: e.user.profile.phone if (e.user and e.user.profile) else "",
+        'job_title': _attr('job_title'),
+        'department': _attr('department'),
+        'job_location': _attr('job_location'),
+        'employment_type': _attr('employment_type'),
+        'salary': _attr('salary'),
+        'hired_at': _attr('hired_at'),
+        'photo_url': _attr('photo'),
+        'manager_id': _attr('manager_id'),
+    },
+    compact=('id', 'user_id', 'name', 'job_title', 'department', 'photo_url', 'performance_avg'),
+    extras=('performance_avg', 'performances')
+)
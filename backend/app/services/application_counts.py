@@ -0,0 +1,89 @@
+from collections import defaultdict
+from sqlalchemy import text
+from ..config import Config
+from ..database import db
+from ..models import Application, JobApplicationCount
+
+# Atomic increment of one (job, status) counter row, created on first use
+UPSERT_SQL = text(
+    "INSERT INTO job_application_counts (job_id, status, total, qualified) "
+    "VALUES (:job_id, :status, :total, :qualified) "
+    "ON CONFLICT (job_id, status) DO UPDATE SET "
+    "total = job_application_counts.total + excluded.total, "
+    "qualified = job_application_counts.qualified + excluded.qualified"
+)
+
+class ApplicationCounts:
+    """
+    Per-job application counters (total and qualified, by status) so listings read a few counter
+    rows instead of loading every application. Writers call these helpers before committing, so
+    the counters change in the same transaction as the applications. `reconcile` rebuilds them
+    from the applications table (`flask reconcile-application-counts`).
+    """
+    def init_app(self, app):
+        with app.app_context():
+            # First start on a database that predates the counters
+            if JobApplicationCount.query.first() is None and Application.query.first() is not None:
+                self.reconcile()
+
+    def is_qualified(self, score):
+        return (score or 0) >= Config.QUALIFIED_MATCH_SCORE
+
+    def adjust(self, job_id, status, total=0, qualified=0):
+        if total or qualified:
+            db.session.execute(UPSERT_SQL, {'job_id': job_id, 'status': status, 'total': total, 'qualified': qualified})
+
+    def added(self, application):
+        self.adjust(application.job_id, application.status, 1, int(self.is_qualified(application.match_score)))
+
+    def status_changed(self, application, old_status):
+        if application.status == old_status:
+            return
+        qualified = int(self.is_qualified(application.match_score))
+        self.adjust(application.job_id, old_status, -1, -qualified)
+        self.adjust(application.job_id, application.status, 1, qualified)
+
+    def rescored(self, job_id, status, old_score, new_score):
+        change = int(self.is_qualified(new_score)) - int(self.is_qualified(old_score))
+        self.adjust(job_id, status, 0, change)
+
+    def for_jobs(self, job_ids):
+        """
+        {job_id: {'total', 'qualified', 'by_status': {status: total}}} in one query; jobs
+        without applications get zeros.
+        """
+        counts = defaultdict(lambda: {'total': 0, 'qualified': 0, 'by_status': {}})
+        if job_ids:
+            rows = JobApplicationCount.query.filter(JobApplicationCount.job_id.in_(job_ids)).all()
+            for row in rows:
+                job = counts[row.job_id]
+                job['total'] += row.total
+                job['qualified'] += row.qualified
+                if row.total:
+                    job['by_status'][row.status] = row.total
+        return {job_id: counts[job_id] for job_id in job_ids}
+
+    def reconcile(self, job_id=None):
+        """
+        Recomputes the counters (of one job, or all) from the applications. Returns the number of counter rows.
+        """
+        query = JobApplicationCount.query
+        apps = db.session.query(
+            Application.job_id, Application.status, db.func.count(Application.id),
+            db.func.sum(db.case((Application.match_score >= Config.QUALIFIED_MATCH_SCORE, 1), else_=0))
+        )
+        if job_id is not None:
+            query = query.filter(JobApplicationCount.job_id == job_id)
+            apps = apps.filter(Application.job_id == job_id)
+        query.delete(synchronize_session=False)
+
+        rows = [
+            {'job_id': row_job_id, 'status': status, 'total': total, 'qualified': int(qualified or 0)}
+            for row_job_id, status, total, qualified in apps.group_by(Application.job_id, Application.status)
+        ]
+        if rows:
+            db.session.execute(db.insert(JobApplicationCount), rows)
+        db.session.commit()
+        return len(rows)
+
+application_counts = ApplicationCounts()
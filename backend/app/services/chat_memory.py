@@ -0,0 +1,150 @@
+import threading
+from ..database import db
+from ..models import ChatMessage, ChatSummary
+from .llm_service import llm_service
+from .prompt_builder import PromptBuilder
+
+class ChatMemory:
+    """
+    Conversation context for the chat endpoints with a constant cost per turn: the last
+    CHAT_MEMORY_TURNS turns verbatim, plus a rolling per-user summary of everything older.
+    Once CHAT_SUMMARY_BATCH messages have slid out of the window, a background thread folds
+    them into the stored summary, so the summary is only ever extended, never rebuilt.
+    """
+    def __init__(self):
+        self._app = None
+        self.turns = 4
+        self.message_chars = 1000
+        self.summary_batch = 4
+        self.backlog = 8
+        self._pending = set() # user ids whose summary needs a refresh
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def init_app(self, app):
+        self._app = app
+        self.turns = app.config.get('CHAT_MEMORY_TURNS', 4)
+        self.message_chars = app.config.get('CHAT_MEMORY_MESSAGE_CHARS', 1000)
+        self.summary_batch = app.config.get('CHAT_SUMMARY_BATCH', 4)
+        self.backlog = app.config.get('CHAT_MEMORY_BACKLOG', 8)
+
+    def build_prompt(self, user_id, prompt, before_id):
+        """
+        Returns the user prompt for the model: summary, recent turns and the new message.
+        before_id is the id of the just-saved message, which is left out of the history.
+        Messages that left the window but are not folded into the summary yet (refresh pending
+        or failed) stay in the history, the newest CHAT_MEMORY_BACKLOG of them, so the prompt
+        stays bounded even while the summary refresh keeps failing.
+        """
+        summary = db.session.get(ChatSummary, user_id)
+        recent = ChatMessage.query \
+            .filter(ChatMessage.user_id == user_id, ChatMessage.id < before_id) \
+            .order_by(ChatMessage.id.desc()) \
+            .limit(self.turns * 2).all()
+        if len(recent) == self.turns * 2 and self.backlog > 0:
+            last_folded = summary.last_message_id if summary else 0
+            recent += ChatMessage.query \
+                .filter(ChatMessage.user_id == user_id, ChatMessage.id > last_folded, ChatMessage.id < recent[-1].id) \
+                .order_by(ChatMessage.id.desc()) \
+                .limit(self.backlog).all()
+
+        parts = []
+        if summary and summary.summary:
+            parts.append(f"Summary of the earlier conversation:\n{summary.summary}")
+        if recent:
+            parts.append("Recent conversation:\n" + "\n".join(self._line(msg) for msg in reversed(recent)))
+        if not parts:
+            return prompt
+        parts.append(f"User: {prompt}")
+        return "\n\n".join(parts)
+
+    def _line(self, msg):
+        speaker = 'User' if msg.sender == 'user' else 'Assistant'
+        text = msg.message
+        if len(text) > self.message_chars:
+            text = text[:self.message_chars] + '...'
+        return f"{speaker}: {text}"
+
+    def note_turn(self, user_id):
+        """
+        Called after a turn is saved. Queues a summary refresh once enough messages left the window.
+        """
+        summary = db.session.get(ChatSummary, user_id)
+        last_folded = summary.last_message_id if summary else 0
+        unsummarized = ChatMessage.query \
+            .filter(ChatMessage.user_id == user_id, ChatMessage.id > last_folded).count()
+        if unsummarized - self.turns * 2 < self.summary_batch:
+            return
+
+        with self._cond:
+            self._pending.add(user_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='chat-memory', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def forget(self, user_id):
+        """Drops the summary, e.g. when the user clears the chat history."""
+        ChatSummary.query.filter_by(user_id=user_id).delete()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                user_ids, self._pending = self._pending, set()
+
+            with self._app.app_context():
+                for user_id in user_ids:
+                    try:
+                        self.refresh(user_id)
+                    except Exception as e:
+                        db.session.rollback()
+                        print(f"Error refreshing chat summary for user {user_id}: {e}")
+                db.session.remove()
+
+    def refresh(self, user_id):
+        """
+        Folds the messages that slid out of the recent window into the user's summary.
+        """
+        summary = db.session.get(ChatSummary, user_id)
+        last_folded = summary.last_message_id if summary else 0
+
+        window = ChatMessage.query.with_entities(ChatMessage.id) \
+            .filter(ChatMessage.user_id == user_id) \
+            .order_by(ChatMessage.id.desc()) \
+            .limit(self.turns * 2).all()
+        if not window:
+            return False
+        window_start = window[-1].id
+
+        messages = ChatMessage.query \
+            .filter(ChatMessage.user_id == user_id, ChatMessage.id > last_folded, ChatMessage.id < window_start) \
+            .order_by(ChatMessage.id.asc()).all()
+        if not messages:
+            return False
+
+        system_prompt = """You maintain the running conversation summary of an HR assistant chat.
+        Update the summary with the new messages. Keep facts about the user (role, goals, jobs and applications
+        discussed, preferences) and open questions; drop small talk. Answer with the updated summary only,
+        at most 150 words, no markdown."""
+        sections = PromptBuilder('chat_summary') \
+            .add('summary', summary.summary if summary else '') \
+            .add_items('messages', [self._line(msg) for msg in messages], weight=2.0, noun='more messages') \
+            .build()
+        user_prompt = f"Current summary:\n{sections['summary'] or '(none)'}\n\nNew messages:\n{sections['messages']}"
+
+        text = llm_service.generate_text(system_prompt, user_prompt, cache=False, task='chat_summary').strip()
+        # A fallback answer is not a summary: keep the old one and retry these messages next time
+        if not text or llm_service.last_outcome() not in ('model', 'mock'):
+            return False
+
+        if summary is None:
+            summary = ChatSummary(user_id=user_id)
+            db.session.add(summary)
+        summary.summary = text
+        summary.last_message_id = messages[-1].id
+        db.session.commit()
+        return True
+
+chat_memory = ChatMemory()
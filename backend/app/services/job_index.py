@@ -0,0 +1,55 @@
+import threading
+from collections import defaultdict
+
+class JobLemmaIndex:
+    """
+    In-memory inverted index from job core lemma (title + tags) to job ids.
+    Answers "which jobs share a core lemma with this profile" without looking at any other job.
+    """
+    def __init__(self):
+        self._postings = defaultdict(set) # lemma -> {job_id}
+        self._job_lemmas = {} # job_id -> frozenset of core lemmas
+        self._lock = threading.RLock()
+
+    def add_job(self, job_id, lemmas):
+        with self._lock:
+            self.remove_job(job_id)
+            lemmas = frozenset(lemmas)
+            self._job_lemmas[job_id] = lemmas
+            for lemma in lemmas:
+                self._postings[lemma].add(job_id)
+
+    def remove_job(self, job_id):
+        with self._lock:
+            lemmas = self._job_lemmas.pop(job_id, None)
+            if not lemmas:
+                return
+            for lemma in lemmas:
+                job_ids = self._postings.get(lemma)
+                if job_ids is not None:
+                    job_ids.discard(job_id)
+                    if not job_ids:
+                        del self._postings[lemma]
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._job_lemmas.clear()
+
+    def candidates(self, lemmas):
+        """
+        Returns {job_id: overlap_count} for every job sharing at least one lemma.
+        """
+        counts = defaultdict(int)
+        with self._lock:
+            for lemma in lemmas:
+                for job_id in self._postings.get(lemma, ()):
+                    counts[job_id] += 1
+        return dict(counts)
+
+    def core_size(self, job_id):
+        lemmas = self._job_lemmas.get(job_id)
+        return len(lemmas) if lemmas else 0
+
+    def __len__(self):
+        return len(self._job_lemmas)
@@ -0,0 +1,233 @@
+import re
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from ..config import Config
+from ..database import db
+
+# Job columns that can be filtered on exactly and are counted per value for search facets
+FACETS = ('department', 'type', 'remote_option', 'experience_level', 'education', 'location')
+
+# Weighted document of a job: title > tags > description. The Postgres GIN index is built on this
+# exact expression, so queries must use it verbatim for the planner to pick the index.
+PG_DOCUMENT = (
+    "(setweight(to_tsvector('english', coalesce(jobs.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(jobs.tags, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(jobs.description, '')), 'C'))"
+)
+
+# SQLite: external-content FTS5 table over jobs, kept in sync by triggers on every write
+SQLITE_FTS_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5("
+    "title, tags, description, content='jobs', content_rowid='id', tokenize='porter unicode61')"
+)
+SQLITE_TRIGGERS = {
+    'jobs_fts_ai': (
+        "CREATE TRIGGER jobs_fts_ai AFTER INSERT ON jobs BEGIN "
+        "INSERT INTO jobs_fts(rowid, title, tags, description) VALUES (new.id, new.title, new.tags, new.description); "
+        "END"
+    ),
+    'jobs_fts_ad': (
+        "CREATE TRIGGER jobs_fts_ad AFTER DELETE ON jobs BEGIN "
+        "INSERT INTO jobs_fts(jobs_fts, rowid, title, tags, description) "
+        "VALUES ('delete', old.id, old.title, old.tags, old.description); "
+        "END"
+    ),
+    'jobs_fts_au': (
+        "CREATE TRIGGER jobs_fts_au AFTER UPDATE OF title, tags, description ON jobs BEGIN "
+        "INSERT INTO jobs_fts(jobs_fts, rowid, title, tags, description) "
+        "VALUES ('delete', old.id, old.title, old.tags, old.description); "
+        "INSERT INTO jobs_fts(rowid, title, tags, description) VALUES (new.id, new.title, new.tags, new.description); "
+        "END"
+    ),
+}
+
+class JobSearchIndex:
+    """
+    Full-text job search in the database: a tsvector GIN expression index on PostgreSQL, an FTS5
+    table on SQLite, and a LIKE scan for anything else. The index follows job writes on its own
+    (expression index / triggers), so routes never have to maintain it.
+
+    Every search term is prefix-matched ("pyth" finds "python") and all terms must match.
+    Results come back ranked by relevance, filtered by location and facets and paginated in SQL.
+    """
+    def __init__(self):
+        self.backend = None # 'postgresql', 'fts5' or 'like'
+
+    def init_app(self, app):
+        with app.app_context():
+            self.ensure_index()
+
+    def ensure_index(self):
+        """
+        Creates the index if missing. Safe to call repeatedly, e.g. again after db.drop_all/create_all.
+        """
+        dialect = db.engine.dialect.name
+        try:
+            if dialect == 'postgresql':
+                db.session.execute(text(f"CREATE INDEX IF NOT EXISTS ix_jobs_fts ON jobs USING GIN ({PG_DOCUMENT})"))
+                self.backend = 'postgresql'
+            elif dialect == 'sqlite':
+                self._ensure_fts5()
+                self.backend = 'fts5'
+            else:
+                self.backend = 'like'
+            db.session.commit()
+        except OperationalError as e:
+            # e.g. SQLite built without FTS5
+            db.session.rollback()
+            print(f"WARNING: Full-text index unavailable, job search falls back to LIKE: {e}")
+            self.backend = 'like'
+
+    def _ensure_fts5(self):
+        db.session.execute(text(SQLITE_FTS_TABLE))
+        existing = {
+            name for (name,) in db.session.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'jobs'")
+            )
+        }
+        missing = [name for name in SQLITE_TRIGGERS if name not in existing]
+        if not missing:
+            return
+        for name in missing:
+            db.session.execute(text(SQLITE_TRIGGERS[name]))
+        # Triggers were missing (new index, or jobs was recreated): the FTS content can't be trusted
+        db.session.execute(text("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')"))
+
+    def _terms(self, q):
+        return re.findall(r"\w+", (q or '').lower())[:16]
+
+    def _salary(self):
+        """
+        jobs.salary (free text such as "1200000" or "12,00,000") as a number; 0 when it has no digits.
+        """
+        if self.backend == 'postgresql':
+            return "coalesce(nullif(regexp_replace(coalesce(jobs.salary, ''), '[^0-9]', '', 'g'), '')::bigint, 0)"
+        # SQLite and the LIKE fallback: drop the usual separators and currency sign, then cast
+        return "CAST(replace(replace(replace(replace(coalesce(jobs.salary, ''), ',', ''), ' ', ''), '₹', ''), '.', '') AS INTEGER)"
+
+    def _query(self, q, location=None, filters=None, min_salary=None, max_salary=None):
+        """
+        (FROM, WHERE, ORDER BY, params) of a search; the WHERE clause is shared by the page,
+        the count and the facet queries.
+        """
+        terms = self._terms(q)
+        source = "jobs"
+        clauses, params = [], {}
+        order = "jobs.created_at DESC, jobs.id DESC"
+
+        if terms and self.backend == 'postgresql':
+            params['query'] = ' & '.join(f"{term}:*" for term in terms)
+            clauses.append(f"{PG_DOCUMENT} @@ to_tsquery('english', :query)")
+            order = f"ts_rank({PG_DOCUMENT}, to_tsquery('english', :query)) DESC, jobs.id DESC"
+        elif terms and self.backend == 'fts5':
+            params['query'] = ' AND '.join(f'"{term}"*' for term in terms)
+            source = "jobs_fts JOIN jobs ON jobs.id = jobs_fts.rowid"
+            clauses.append("jobs_fts MATCH :query")
+            # bm25: lower is better; a title hit weighs 10x a description hit
+            order = "bm25(jobs_fts, 10.0, 5.0, 1.0), jobs.id DESC"
+        elif terms:
+            for i, term in enumerate(terms):
+                params[f'term{i}'] = f"%{term}%"
+                clauses.append(
+                    f"(lower(jobs.title) LIKE :term{i} OR lower(coalesce(jobs.tags, '')) LIKE :term{i} "
+                    f"OR lower(coalesce(jobs.description, '')) LIKE :term{i})"
+                )
+
+        if location:
+            clauses.append("lower(jobs.location) LIKE :location")
+            params['location'] = f"%{location.lower()}%"
+
+        # Exact-value facet filters; several values of one facet are OR-ed
+        for column, values in (filters or {}).items():
+            if column not in FACETS or not values:
+                continue
+            names = []
+            for i, value in enumerate(values):
+                params[f'{column}{i}'] = value
+                names.append(f":{column}{i}")
+            clauses.append(f"jobs.{column} IN ({', '.join(names)})")
+
+        # Salary bounds; jobs without a stated salary never match a bound
+        if min_salary is not None or max_salary is not None:
+            salary = self._salary()
+            clauses.append(f"{salary} > 0")
+            if min_salary is not None:
+                clauses.append(f"{salary} >= :min_salary")
+                params['min_salary'] = min_salary
+            if max_salary is not None:
+                clauses.append(f"{salary} <= :max_salary")
+                params['max_salary'] = max_salary
+
+        where = ' AND '.join(clauses) if clauses else "1 = 1"
+        return source, where, order, params
+
+    def search(self, q, location=None, filters=None, limit=20, offset=0, facets=False, min_salary=None, max_salary=None):
+        """
+        Returns (total, [job_id, ...], facet_counts) for one page, best match first.
+        Without search terms the jobs are only filtered, newest first. limit=None returns the ids
+        of every hit, still in that order (for callers that rank the hits themselves).
+        facet_counts is None unless requested; its query also yields the total.
+        """
+        if self.backend is None:
+            self.ensure_index()
+        source, where, order, params = self._query(q, location, filters, min_salary, max_salary)
+
+        if facets:
+            total, facet_counts = self._facet_counts(source, where, params)
+        else:
+            total = db.session.execute(text(f"SELECT count(*) FROM {source} WHERE {where}"), params).scalar() or 0
+            facet_counts = None
+        if not total:
+            return 0, [], facet_counts
+
+        if limit is None:
+            rows = db.session.execute(text(f"SELECT jobs.id FROM {source} WHERE {where} ORDER BY {order}"), params)
+            return total, [row[0] for row in rows], facet_counts
+        rows = db.session.execute(
+            text(f"SELECT jobs.id FROM {source} WHERE {where} ORDER BY {order} LIMIT :limit OFFSET :offset"),
+            {**params, 'limit': limit, 'offset': offset}
+        )
+        return total, [row[0] for row in rows], facet_counts
+
+    def _facet_counts(self, source, where, params):
+        """
+        Value counts of every facet over the whole result set in one query: GROUPING SETS on
+        PostgreSQL, one GROUP BY per facet glued with UNION ALL elsewhere.
+        Returns (total, {facet: [{'value', 'count'}, ...]}), most frequent values first.
+        """
+        if self.backend == 'postgresql':
+            columns = ', '.join(f"jobs.{facet}" for facet in FACETS)
+            groupings = ', '.join(f"GROUPING(jobs.{facet})" for facet in FACETS)
+            sets = ', '.join(f"(jobs.{facet})" for facet in FACETS)
+            rows = db.session.execute(text(
+                f"SELECT {columns}, {groupings}, count(*) FROM {source} WHERE {where} GROUP BY GROUPING SETS ({sets})"
+            ), params)
+            n = len(FACETS)
+            grouped = []
+            for row in rows:
+                # GROUPING(col) is 0 only for the column this row is grouped by
+                i = tuple(row[n:2 * n]).index(0)
+                grouped.append((FACETS[i], row[i], row[2 * n]))
+        else:
+            columns = ', '.join(f"jobs.{facet}" for facet in FACETS)
+            parts = ' UNION ALL '.join(
+                f"SELECT '{facet}', {facet}, count(*) FROM hits GROUP BY {facet}" for facet in FACETS
+            )
+            grouped = db.session.execute(text(
+                f"WITH hits AS (SELECT {columns} FROM {source} WHERE {where}) {parts}"
+            ), params).all()
+
+        counts = {facet: [] for facet in FACETS}
+        total = 0
+        for facet, value, count in grouped:
+            if facet == FACETS[0]:
+                # Every hit lands in exactly one group of the first facet, NULL included
+                total += count
+            if value not in (None, ''):
+                counts[facet].append({'value': value, 'count': count})
+        for facet, values in counts.items():
+            values.sort(key=lambda item: (-item['count'], str(item['value'])))
+            del values[Config.JOBS_FACET_VALUES:]
+        return total, counts
+
+job_search = JobSearchIndex()
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from .lru_cache import LRUCache
+
+class LLMResponseCache:
+    """
+    Content-addressed cache for LLM responses, keyed by a hash of (model, system_prompt, user_prompt).
+    Tier 1 is a bounded in-memory LRU with TTL, tier 2 an optional SQLite file that survives restarts
+    and is shared by every worker process on the host.
+    """
+    def __init__(self, maxsize=512, ttl=86400, path=None):
+        self.ttl = ttl
+        self.path = path
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+        if path:
+            self._init_disk()
+
+    @staticmethod
+    def make_key(model, system_prompt, user_prompt):
+        payload = json.dumps([model, system_prompt, user_prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _init_disk(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self._count('memory_hits')
+            return value
+
+        if self.path:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute(
+                        "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                if row and (not self.ttl or row[1] + self.ttl > time.time()):
+                    self.memory.set(key, row[0])
+                    self._count('disk_hits')
+                    return row[0]
+            except sqlite3.Error as e:
+                print(f"LLM cache read error: {e}")
+
+        self._count('misses')
+        return None
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        self._count('stores')
+        if self.path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, response, created_at) VALUES (?, ?, ?)",
+                        (key, value, time.time())
+                    )
+                    if self.ttl:
+                        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,))
+            except sqlite3.Error as e:
+                print(f"LLM cache write error: {e}")
+
+    def clear(self):
+        self.memory.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM llm_cache")
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = counters['memory_hits'] + counters['disk_hits'] + counters['misses']
+        counters['hit_rate'] = round((counters['memory_hits'] + counters['disk_hits']) / lookups, 3) if lookups else 0.0
+        counters['memory_size'] = len(self.memory)
+        counters['disk_enabled'] = bool(self.path)
+        return counters
@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import defaultdict, deque
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# How every call ended, from the caller's point of view
+# ('error': a stream that failed after part of the answer was sent)
+OUTCOMES = ('model', 'cache_hit', 'semantic_hit', 'coalesced', 'fallback', 'mock', 'error')
+
+class _TaskStats:
+    def __init__(self):
+        self.calls = 0
+        self.outcomes = defaultdict(int)
+        self.wall_time = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.prompt_chars = 0
+        self.response_chars = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.prompts_built = 0
+        self.prompt_tokens_saved = 0
+
+class LLMMetrics:
+    """
+    Per-task counters and latency histograms for every LLM call, plus a rolling window of
+    recent calls to see which prompt type is eating the latency budget right now.
+    Token counts are only added when the API reports them (usage_metadata).
+    """
+    def __init__(self, window=300, price_per_1m_input=0.0, price_per_1m_output=0.0):
+        self.window = window # seconds
+        self.price_per_1m_input = price_per_1m_input
+        self.price_per_1m_output = price_per_1m_output
+        self._tasks = defaultdict(_TaskStats)
+        self._recent = deque() # (finished_at, task, wall_time, outcome)
+        self._lock = threading.Lock()
+
+    def record(self, task, wall_time, outcome, prompt_chars=0, response_chars=0,
+               prompt_tokens=None, response_tokens=None):
+        now = time.time()
+        with self._lock:
+            stats = self._tasks[task]
+            stats.calls += 1
+            stats.outcomes[outcome] += 1
+            stats.wall_time += wall_time
+            stats.buckets[self._bucket(wall_time)] += 1
+            stats.prompt_chars += prompt_chars
+            stats.response_chars += response_chars
+            stats.prompt_tokens += prompt_tokens or 0
+            stats.response_tokens += response_tokens or 0
+
+            self._recent.append((now, task, wall_time, outcome))
+            self._trim(now)
+
+    def record_prompt(self, task, original_tokens, final_tokens):
+        """Counts the (estimated) tokens a PromptBuilder saved for a task."""
+        with self._lock:
+            stats = self._tasks[task]
+            stats.prompts_built += 1
+            stats.prompt_tokens_saved += max(original_tokens - final_tokens, 0)
+
+    def _bucket(self, wall_time):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if wall_time <= bound:
+                return i
+        return len(LATENCY_BUCKETS)
+
+    def _trim(self, now):
+        cutoff = now - self.window
+        while self._recent and self._recent[0][0] < cutoff:
+            self._recent.popleft()
+
+    def _cost(self, stats):
+        return (stats.prompt_tokens * self.price_per_1m_input
+                + stats.response_tokens * self.price_per_1m_output) / 1_000_000
+
+    def snapshot(self):
+        """
+        Lifetime totals per task and the rolling summary, as a JSON-ready dict.
+        """
+        with self._lock:
+            self._trim(time.time())
+            totals = {
+                task: {
+                    'calls': stats.calls,
+                    'outcomes': dict(stats.outcomes),
+                    'wall_time_seconds': round(stats.wall_time, 3),
+                    'avg_latency_seconds': round(stats.wall_time / stats.calls, 3) if stats.calls else 0.0,
+                    'latency_histogram': [
+                        {'le': str(bound), 'count': count}
+                        for bound, count in zip(list(LATENCY_BUCKETS) + ['+Inf'], stats.buckets)
+                    ],
+                    'prompt_chars': stats.prompt_chars,
+                    'response_chars': stats.response_chars,
+                    'prompt_tokens': stats.prompt_tokens,
+                    'response_tokens': stats.response_tokens,
+                    'prompts_built': stats.prompts_built,
+                    'prompt_tokens_saved': stats.prompt_tokens_saved,
+                    'estimated_cost_usd': round(self._cost(stats), 6)
+                } for task, stats in self._tasks.items()
+            }
+            recent = list(self._recent)
+
+        return {'totals': totals, 'recent': self._summarize(recent)}
+
+    def _summarize(self, recent):
+        by_task = defaultdict(list)
+        for _, task, wall_time, outcome in recent:
+            by_task[task].append((wall_time, outcome))
+        busy = sum(wall_time for _, _, wall_time, _ in recent)
+
+        tasks = {}
+        for task, calls in by_task.items():
+            times = sorted(wall_time for wall_time, _ in calls)
+            total = sum(times)
+            tasks[task] = {
+                'calls': len(calls),
+                'model_calls': sum(1 for _, outcome in calls if outcome == 'model'),
+                'wall_time_seconds': round(total, 3),
+                'share_of_latency': round(total / busy, 3) if busy else 0.0,
+                'p50_seconds': round(self._percentile(times, 0.50), 3),
+                'p95_seconds': round(self._percentile(times, 0.95), 3),
+                'p99_seconds': round(self._percentile(times, 0.99), 3)
+            }
+        # Biggest latency consumers first
+        tasks = dict(sorted(tasks.items(), key=lambda item: item[1]['wall_time_seconds'], reverse=True))
+        return {'window_seconds': self.window, 'calls': len(recent), 'tasks': tasks}
+
+    def _percentile(self, sorted_values, q):
+        if not sorted_values:
+            return 0.0
+        return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+    def prometheus(self):
+        """
+        Lifetime metrics in the Prometheus text exposition format.
+        """
+        families = {
+            'llm_calls_total': ('counter', []),
+            'llm_call_duration_seconds': ('histogram', []),
+            'llm_prompt_chars_total': ('counter', []),
+            'llm_response_chars_total': ('counter', []),
+            'llm_prompt_tokens_total': ('counter', []),
+            'llm_response_tokens_total': ('counter', []),
+            'llm_prompt_tokens_saved_total': ('counter', [])
+        }
+        with self._lock:
+            for task, stats in sorted(self._tasks.items()):
+                for outcome, count in sorted(stats.outcomes.items()):
+                    families['llm_calls_total'][1].append(f'llm_calls_total{{task="{task}",outcome="{outcome}"}} {count}')
+                histogram = families['llm_call_duration_seconds'][1]
+                cumulative = 0
+                for bound, count in zip(list(LATENCY_BUCKETS) + ['+Inf'], stats.buckets):
+                    cumulative += count
+                    histogram.append(f'llm_call_duration_seconds_bucket{{task="{task}",le="{bound}"}} {cumulative}')
+                histogram.append(f'llm_call_duration_seconds_sum{{task="{task}"}} {stats.wall_time:.6f}')
+                histogram.append(f'llm_call_duration_seconds_count{{task="{task}"}} {stats.calls}')
+                families['llm_prompt_chars_total'][1].append(f'llm_prompt_chars_total{{task="{task}"}} {stats.prompt_chars}')
+                families['llm_response_chars_total'][1].append(f'llm_response_chars_total{{task="{task}"}} {stats.response_chars}')
+                families['llm_prompt_tokens_total'][1].append(f'llm_prompt_tokens_total{{task="{task}"}} {stats.prompt_tokens}')
+                families['llm_response_tokens_total'][1].append(f'llm_response_tokens_total{{task="{task}"}} {stats.response_tokens}')
+                families['llm_prompt_tokens_saved_total'][1].append(f'llm_prompt_tokens_saved_total{{task="{task}"}} {stats.prompt_tokens_saved}')
+
+        lines = []
+        for name, (kind, samples) in families.items():
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._tasks.clear()
+            self._recent.clear()
@@ -1,33 +1,180 @@
 import os
+import re
 import json
+import time
+import threading
 import google.generativeai as genai
+from ..config import Config
+from .llm_cache import LLMResponseCache
+from .single_flight import SingleFlight
+from .llm_metrics import LLMMetrics
 
 class LLMService:
     def __init__(self):
         self.mode = "mock" # Default to mock
+        self.model_name = 'gemini-2.5-flash'
 
         api_key = os.getenv("GEMINI_API_KEY")
         if api_key and api_key != "mock":
             genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
+            self.model = genai.GenerativeModel(self.model_name)
             self.mode = "gemini"
 
-    def generate_text(self, system_prompt, user_prompt):
+        # Identical prompts (same JD request, same interview guide...) are answered from here
+        self.cache = LLMResponseCache(
+            maxsize=Config.LLM_CACHE_SIZE,
+            ttl=Config.LLM_CACHE_TTL,
+            path=Config.LLM_CACHE_PATH
+        )
+        # Identical prompts that are already being generated wait for that call instead
+        self.in_flight = SingleFlight()
+        # Outcome of the calling thread's last call (see last_outcome)
+        self._local = threading.local()
+        # Latency, size, token and outcome of every call, per task
+        self.metrics = LLMMetrics(
+            window=Config.LLM_METRICS_WINDOW,
+            price_per_1m_input=Config.LLM_PRICE_PER_1M_INPUT_TOKENS,
+            price_per_1m_output=Config.LLM_PRICE_PER_1M_OUTPUT_TOKENS
+        )
+
+    def generate_text(self, system_prompt, user_prompt, cache=True, task='general'):
         """
         Generates text based on prompts.
+        Pass cache=False for non-deterministic flows (e.g. chat) that must always hit the model.
+        Concurrent cacheable calls with the same prompt share one in-flight model call.
+        task names the caller (jd, chat, explanation...) in the LLM metrics.
         """
+        started = time.perf_counter()
+        usage = None
         if self.mode == "mock":
-            return self._mock_response(system_prompt, user_prompt)
+            text, outcome = self._mock_response(system_prompt, user_prompt), 'mock'
         elif self.mode == "gemini":
-            try:
-                combined_prompt = f"{system_prompt}\n\nUser Request: {user_prompt}"
-                response = self.model.generate_content(combined_prompt)
-                return response.text
-            except Exception as e:
-                print(f"Gemini API Error: {e}")
-                return self._mock_response(system_prompt, user_prompt) # Fallback to mock on error
+            if not cache:
+                text, ok, usage = self._call_gemini(system_prompt, user_prompt)
+                outcome = 'model' if ok else 'fallback'
+            else:
+                key = self.cache.make_key(self.model_name, system_prompt, user_prompt)
+                text = self.cache.get(key)
+                if text is not None:
+                    outcome = 'cache_hit'
+                else:
+                    led = {}
+
+                    def call():
+                        text, ok, usage = self._call_gemini(system_prompt, user_prompt)
+                        led.update(ok=ok, usage=usage)
+                        # Fallback (mock) answers are never cached
+                        if ok and text:
+                            self.cache.set(key, text)
+                        return text
+
+                    text = self.in_flight.do(key, call)
+                    if not led:
+                        outcome = 'coalesced'
+                    else:
+                        outcome = 'model' if led['ok'] else 'fallback'
+                        usage = led['usage']
+        else:
+            return "Error: No LLM provider configured."
+
+        self._record(task, started, outcome, system_prompt, user_prompt, text, usage)
+        return text
+
+    def generate_text_stream(self, system_prompt, user_prompt, task='chat_stream'):
+        """
+        Streaming variant of generate_text: yields the response in chunks as they are generated.
+        Never served from or stored in the response cache. When the upstream stream breaks after
+        chunks were sent, the answer is incomplete: last_outcome() is then 'error'.
+        """
+        started = time.perf_counter()
+        state = {'outcome': 'mock' if self.mode == "mock" else 'model', 'usage': None}
+        response_parts = []
+        if self.mode == "mock":
+            chunks = self._mock_stream(system_prompt, user_prompt)
+        elif self.mode == "gemini":
+            chunks = self._stream_gemini(system_prompt, user_prompt, state)
+        else:
+            yield "Error: No LLM provider configured."
+            return
+
+        try:
+            for chunk in chunks:
+                response_parts.append(chunk)
+                yield chunk
+        finally:
+            # Also recorded when the client disconnects mid-stream
+            self._record(task, started, state['outcome'], system_prompt, user_prompt,
+                         ''.join(response_parts), state['usage'])
+
+    def _stream_gemini(self, system_prompt, user_prompt, state):
+        streamed = False
+        try:
+            combined_prompt = f"{system_prompt}\n\nUser Request: {user_prompt}"
+            for chunk in self.model.generate_content(combined_prompt, stream=True):
+                # The last chunk carries the usage of the whole response
+                state['usage'] = self._usage(chunk) or state['usage']
+                if chunk.text:
+                    streamed = True
+                    yield chunk.text
+        except Exception as e:
+            print(f"Gemini API Error: {e}")
+            # Fall back to mock only if nothing reached the client yet
+            if not streamed:
+                state['outcome'] = 'fallback'
+                yield from self._mock_stream(system_prompt, user_prompt)
+            else:
+                # Part of the answer is out: it can't be replaced, only flagged as cut off
+                state['outcome'] = 'error'
+
+    def _mock_stream(self, system_prompt, user_prompt):
+        text = self._mock_response(system_prompt, user_prompt)
+        size = max(Config.LLM_MOCK_STREAM_CHUNK_SIZE, 1)
+        for i in range(0, len(text), size):
+            if i and Config.LLM_MOCK_STREAM_DELAY > 0:
+                time.sleep(Config.LLM_MOCK_STREAM_DELAY)
+            yield text[i:i + size]
+
+    def _call_gemini(self, system_prompt, user_prompt):
+        """
+        Returns (text, ok, usage). On API errors falls back to the mock response with ok=False.
+        """
+        try:
+            combined_prompt = f"{system_prompt}\n\nUser Request: {user_prompt}"
+            response = self.model.generate_content(combined_prompt)
+            return response.text, True, self._usage(response)
+        except Exception as e:
+            print(f"Gemini API Error: {e}")
+            return self._mock_response(system_prompt, user_prompt), False, None # Fallback to mock on error
 
-        return "Error: No LLM provider configured."
+    def _usage(self, response):
+        """
+        (prompt_tokens, response_tokens) from the response's usage_metadata, if the API sent it.
+        """
+        usage = getattr(response, 'usage_metadata', None)
+        if not usage or not getattr(usage, 'prompt_token_count', None):
+            return None
+        return usage.prompt_token_count, getattr(usage, 'candidates_token_count', 0) or 0
+
+    def last_outcome(self):
+        """
+        How this thread's last call ended ('model', 'cache_hit', 'coalesced', 'fallback', 'mock', or 'error'
+        for a stream cut off midway).
+        Lets callers avoid keeping fallback answers.
+        """
+        return getattr(self._local, 'outcome', None)
+
+    def _record(self, task, started, outcome, system_prompt, user_prompt, text, usage):
+        self._local.outcome = outcome
+        prompt_tokens, response_tokens = usage or (None, None)
+        self.metrics.record(
+            task,
+            time.perf_counter() - started,
+            outcome,
+            prompt_chars=len(system_prompt) + len(user_prompt),
+            response_chars=len(text or ''),
+            prompt_tokens=prompt_tokens,
+            response_tokens=response_tokens
+        )
 
     def _mock_response(self, system_prompt, user_prompt):
         """
@@ -35,6 +182,26 @@ class LLMService:
         """
         system_prompt_lower = system_prompt.lower()
 
+        if "conversation summary" in system_prompt_lower:
+            previous = user_prompt.split("Current summary:\n", 1)[-1].split("\n\nNew messages:", 1)[0]
+            asked = [line[len("User: "):] for line in user_prompt.splitlines() if line.startswith("User: ")]
+            summary = "" if previous == "(none)" else previous + " "
+            return (summary + "The user asked about: " + "; ".join(asked))[-600:]
+
+        if "polish the verdict" in system_prompt_lower:
+            return user_prompt.rsplit("Verdict: ", 1)[-1]
+
+        # Checked first: the batch prompt also mentions the job description
+        if "match explanations" in system_prompt_lower:
+            candidates = re.findall(r"^CANDIDATE (\d+) \(match score ([\d.]+)/100\)", user_prompt, re.M)
+            return json.dumps({
+                idx: {
+                    "strengths": ["Relevant experience for the role."],
+                    "missing": ["Some of the listed requirements."],
+                    "verdict": f"The candidate covers part of the role, giving a score of {score}."
+                } for idx, score in candidates
+            })
+
         if "job description" in system_prompt_lower:
             return json.dumps({
                 "generated_description": "We are seeking a highly skilled professional to join our dynamic team. You will be responsible for...",
@@ -67,7 +234,9 @@ class LLMService:
             # For ranking, we usually return a list.
             return "Rank 1: Candidate A (90%)\nRank 2: Candidate B (85%)"
 
-        return f"AI Response: {user_prompt[:50]}..."
+        # Chat prompts carry the conversation memory first; answer the latest message
+        latest = user_prompt.rsplit("\n\nUser: ", 1)[-1]
+        return f"AI Response: {latest[:50]}..."
 
     def parse_resume_mock(self, file_content):
         """
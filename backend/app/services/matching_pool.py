@@ -0,0 +1,55 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+def _warm_worker():
+    # Load the spaCy model once per worker process, when the worker starts
+    from .matching_service import matching_service
+    matching_service.nlp
+
+def _extract_chunk(texts):
+    # Runs in a worker: same code as the serial path, so results are identical
+    from .matching_service import matching_service
+    return matching_service.extract_features(texts)
+
+class MatchingPool:
+    """
+    Process pool for CPU-bound spaCy parsing. Each worker keeps its own copy of the model,
+    and work is split into chunks that workers parse with nlp.pipe.
+    """
+    def __init__(self, workers, chunk_size):
+        self.workers = workers
+        self.chunk_size = max(1, chunk_size)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.workers > 1
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: never fork a process that may hold DB connections or locks
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_warm_worker
+                )
+            return self._executor
+
+    def extract(self, texts):
+        """
+        Parses (lemma_text, vector_text) pairs across the workers, keeping input order.
+        """
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        results = []
+        for chunk_result in self._get_executor().map(_extract_chunk, chunks):
+            results.extend(chunk_result)
+        return results
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
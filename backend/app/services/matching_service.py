@@ -1,18 +1,166 @@
-import spacy
 import json
+import os
 import re
+import hashlib
+import heapq
+import threading
+from datetime import datetime
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from flask import current_app
+from ..database import db
+from ..config import Config
+from sqlalchemy import func, update, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from ..models import Job, JobFeature, Profile, ProfileFeature, User, Application
 from .llm_service import llm_service
+from .lru_cache import LRUCache
+from .job_index import JobLemmaIndex
+from .profile_index import ProfileMatrix
+from .matching_pool import MatchingPool
+from .prompt_builder import PromptBuilder
+
+# Bump when the way features are extracted changes, so stored rows get rebuilt.
+FEATURE_VERSION = 1
+
+# Precomputed job-side inputs for calculate_score
+JobFeatures = namedtuple('JobFeatures', ['lemmas', 'vector', 'lemma_ids'])
+ProfileFeatures = namedtuple('ProfileFeatures', ['lemmas', 'vector'])
+
+MODEL_NAME = "en_core_web_md"
+# Scoring only needs lemmas (tok2vec + tagger + attribute_ruler + lemmatizer), stop words
+# and the static vectors, so the dependency parser and NER are never loaded.
+EXCLUDED_COMPONENTS = ["parser", "ner", "senter"]
+
+def load_nlp():
+    import spacy # Importing spaCy alone takes a while, so it is deferred too
+    try:
+        print("Loading spaCy model...")
+        # Ensure you have run: python -m spacy download en_core_web_md
+        nlp = spacy.load(MODEL_NAME, exclude=EXCLUDED_COMPONENTS)
+        print("spaCy model loaded successfully.")
+    except OSError:
+        print("WARNING: 'en_core_web_md' model not found. Using blank model.")
+        nlp = spacy.blank("en")
+
+    if Config.MATCHING_VECTORS_MMAP_PATH:
+        use_mmap_vectors(nlp, Config.MATCHING_VECTORS_MMAP_PATH)
+    return nlp
+
+def export_vectors(nlp, path):
+    """
+    Writes the model's static vector table to an .npy file that processes can memory-map.
+    Written to a temp file first so concurrent workers never see a partial file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.asarray(nlp.vocab.vectors.data, dtype=np.float32))
+    os.replace(tmp_path, path)
+
+def use_mmap_vectors(nlp, path):
+    """
+    Swaps the in-heap vector table for a read-only memory map of the same data. Every worker
+    process then shares one copy through the page cache. Token, Doc and tok2vec lookups all
+    read vocab.vectors.data, so document vectors come straight from the mmap.
+    """
+    vectors = nlp.vocab.vectors
+    if vectors.shape[0] == 0:
+        return
+    try:
+        if not os.path.exists(path):
+            export_vectors(nlp, path)
+        table = np.load(path, mmap_mode='r')
+        if table.shape != vectors.shape or table.dtype != np.float32:
+            print(f"WARNING: Vectors in {path} don't match the model. Delete the file to regenerate it.")
+            return
+        vectors.data = table
+        print(f"Using memory-mapped vectors from {path}.")
+    except Exception as e:
+        print(f"WARNING: Could not memory-map vectors from {path}: {e}")
 
 class MatchingService:
     def __init__(self):
-        try:
-            print("Loading spaCy model...")
-            # Ensure you have run: python -m spacy download en_core_web_md
-            self.nlp = spacy.load("en_core_web_md")
-            print("spaCy model loaded successfully.")
-        except OSError:
-            print("WARNING: 'en_core_web_md' model not found. Using blank model.")
-            self.nlp = spacy.blank("en")
+        # The model is loaded on first use (or by warmup()), not at import time
+        self._nlp = None
+        self._nlp_lock = threading.Lock()
+
+        # Parsed profiles keyed by (profile_id, version)
+        self._profile_cache = LRUCache(maxsize=Config.PROFILE_FEATURE_CACHE_SIZE)
+        # Decoded job features keyed by job_id -> (content_hash, JobFeatures)
+        self._job_cache = {}
+        # Lemma -> integer id, shared by all jobs for the bitset keyword overlap
+        self._lemma_vocab = {}
+        self._vocab_lock = threading.Lock()
+        self._signature = None
+        self._signature_nlp = None
+        # Inverted index over job core lemmas, synced from job_features (see _sync_job_index)
+        self.job_index = JobLemmaIndex()
+        self._job_index_state = None # (row count, latest updated_at) of job_features at last sync
+        self._job_index_lock = threading.Lock()
+        # Job vectors + lemmas in the same layout, synced with the index: ranks the catalog for a profile
+        self.job_matrix = ProfileMatrix()
+        # Candidate vectors + lemma index for reverse matching, built from the computed profile features
+        self.profile_matrix = ProfileMatrix()
+        self._profile_matrix_versions = {} # profile_id -> feature version held in the matrix
+        self._profile_matrix_pending = 0 # candidates not parsed into the matrix yet
+        self._profile_matrix_lock = threading.Lock()
+        self._warmup_thread = None
+        self._warmup_lock = threading.Lock()
+        self._app = None
+        # Optional process pool for parsing large batches on all cores
+        self.pool = MatchingPool(Config.MATCHING_POOL_WORKERS, Config.MATCHING_POOL_CHUNK_SIZE)
+        # Threads for the optional LLM polish of local explanations, created on first use
+        self._polish_pool = None
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            with self._nlp_lock:
+                if self._nlp is None:
+                    self._nlp = load_nlp()
+        return self._nlp
+
+    @nlp.setter
+    def nlp(self, value):
+        self._nlp = value
+
+    def init_app(self, app):
+        self._app = app
+        # The spaCy model is lazy; servers can opt into paying the load (and the candidate parse) up front
+        if app.config.get('MATCHING_WARMUP'):
+            self.warmup()
+            self.warm_profile_matrix()
+
+    def warmup(self):
+        """
+        Loads the spaCy model now instead of on the first scoring request.
+        """
+        return self.nlp
+
+    def warm_profile_matrix(self):
+        """
+        Parses every new or edited candidate into the reverse-matching matrix in a background
+        thread. No-op while a warm-up is already running.
+        """
+        with self._warmup_lock:
+            if self._warmup_thread is not None and self._warmup_thread.is_alive():
+                return
+            app = self._app or current_app._get_current_object()
+            self._warmup_thread = threading.Thread(target=self._warm_profile_matrix, args=(app,), daemon=True)
+            self._warmup_thread.start()
+
+    def _warm_profile_matrix(self, app):
+        with app.app_context():
+            try:
+                with self._profile_matrix_lock:
+                    self._sync_profile_matrix()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error warming up the candidate matrix: {e}")
+            finally:
+                db.session.remove()
 
     def _clean_text(self, text):
         if not text:
@@ -26,9 +174,39 @@ class MatchingService:
         Extracts base forms of words (lemmas) to match 'Analyzing' with 'Analysis'.
         """
         doc = self.nlp(self._clean_text(text))
+        return self._lemmas_from_doc(doc)
+
+    def _lemmas_from_doc(self, doc):
         # Filter out stop words, punctuation, and short junk
         return set([token.lemma_ for token in doc if not token.is_stop and not token.is_punct and len(token.text) > 2])
 
+    def extract_features(self, texts):
+        """
+        Parses (lemma_text, vector_text) pairs with nlp.pipe and returns (lemmas, vector) for each.
+        This is the serial path and also what each pool worker runs.
+        """
+        lemma_docs = self.nlp.pipe((self._clean_text(lemma_text) for lemma_text, _ in texts), batch_size=64)
+        vector_docs = self.nlp.pipe((vector_text[:100000] for _, vector_text in texts), batch_size=64)
+        results = []
+        for lemma_doc, vector_doc in zip(lemma_docs, vector_docs):
+            lemmas = frozenset(self._lemmas_from_doc(lemma_doc))
+            results.append((lemmas, np.asarray(vector_doc.vector, dtype=np.float32)))
+        return results
+
+    def embed_text(self, text):
+        """
+        (lemmas, vector) of a short free text such as a chat prompt.
+        """
+        return self.extract_features([(text, text)])[0]
+
+    def extract_features_many(self, texts):
+        """
+        Same as extract_features, fanned out to the process pool when enabled and the batch is large.
+        """
+        if self.pool.enabled and len(texts) > self.pool.chunk_size:
+            return self.pool.extract(texts)
+        return self.extract_features(texts)
+
     def _construct_profile_text(self, profile):
         """
         Constructs a rich text representation of the profile for Vector embedding.
@@ -72,83 +250,729 @@ class MatchingService:
             
         return ". ".join(text_parts)
 
-    def calculate_score(self, profile, job):
+    def _construct_job_core_text(self, job):
+        """
+        Constructs the job "Must Haves" text (Title + Tags) used for keyword matching.
+        """
+        job_core_text = f"{job.title} {job.title}" # Double weight on title
+        if job.tags:
+            job_core_text += f" {job.tags.replace(',', ' ')}"
+        return job_core_text
+
+    def _model_signature(self):
+        """
+        Name and version of the loaded pipeline (nlp.meta is slow, so it is cached per pipeline).
+        """
+        if self._signature_nlp is not self.nlp:
+            meta = self.nlp.meta
+            self._signature = f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}"
+            self._signature_nlp = self.nlp
+        return self._signature
+
+    def _job_content_hash(self, job):
+        """
+        Hash of everything the job features depend on. If it changes, the stored features are stale.
+        """
+        payload = "\x1f".join([
+            f"v{FEATURE_VERSION}",
+            self._model_signature(),
+            self._construct_job_core_text(job),
+            self._construct_job_text_for_vector(job)[:100000],
+        ])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def compute_job_features(self, job):
+        """
+        Runs spaCy over the job once and returns the core lemmas and the document vector.
+        """
+        return self.compute_job_features_many([job])[0]
+
+    def compute_job_features_many(self, jobs):
+        texts = [(self._construct_job_core_text(job), self._construct_job_text_for_vector(job)) for job in jobs]
+        return [
+            JobFeatures(lemmas, vector, self._lemma_ids(lemmas))
+            for lemmas, vector in self.extract_features_many(texts)
+        ]
+
+    def refresh_job_features(self, job):
+        """
+        Rebuilds the stored features of a job if its content changed.
+        Does not commit: call it before the route commits the job itself.
+        """
+        content_hash = self._job_content_hash(job)
+        feature = job.feature
+        if feature is not None and feature.content_hash == content_hash:
+            return self._decode_job_features(feature)
+
+        features = self.compute_job_features(job)
+        if feature is None:
+            feature = JobFeature()
+            job.feature = feature
+        feature.content_hash = content_hash
+        feature.lemmas = json.dumps(sorted(features.lemmas))
+        feature.vector = features.vector.tobytes()
+        return features
+
+    def get_job_features_many(self, jobs):
+        """
+        Returns the features of every job, in order.
+        Served from the in-process cache while the content hash matches, otherwise from the
+        job_features table in one query. Missing or stale rows are backfilled in a single commit.
+        """
+        hashes = [self._job_content_hash(job) for job in jobs]
+        results = [None] * len(jobs)
+        missing = []
+        for i, job in enumerate(jobs):
+            cached = self._job_cache.get(job.id)
+            if cached is not None and cached[0] == hashes[i]:
+                results[i] = cached[1]
+            else:
+                missing.append(i)
+
+        if not missing:
+            return results
+
+        stored = {}
+        job_ids = [jobs[i].id for i in missing if jobs[i].id is not None]
+        for start in range(0, len(job_ids), 500):
+            for feature in JobFeature.query.filter(JobFeature.job_id.in_(job_ids[start:start + 500])).all():
+                stored[feature.job_id] = feature
+
+        stale = [i for i in missing if stored.get(jobs[i].id) is None or stored[jobs[i].id].content_hash != hashes[i]]
+        computed = dict(zip(stale, self.compute_job_features_many([jobs[i] for i in stale])))
+
+        backfilled = False
+        for i in missing:
+            job = jobs[i]
+            feature = stored.get(job.id)
+            if i not in computed:
+                features = self._decode_job_features(feature)
+            else:
+                features = computed[i]
+                if job.id is not None:
+                    if feature is None:
+                        feature = JobFeature(job_id=job.id)
+                        db.session.add(feature)
+                    feature.content_hash = hashes[i]
+                    feature.lemmas = json.dumps(sorted(features.lemmas))
+                    feature.vector = features.vector.tobytes()
+                    backfilled = True
+            if job.id is not None:
+                self._job_cache[job.id] = (hashes[i], features)
+            results[i] = features
+
+        if backfilled:
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error saving job features: {e}")
+
+        return results
+
+    def forget_job(self, job_id):
+        """
+        Drops a deleted job from the in-process feature cache and the inverted index.
+        """
+        self._job_cache.pop(job_id, None)
+        self.job_index.remove_job(job_id)
+        self.job_matrix.remove(job_id)
+
+    def index_job(self, job):
+        """
+        Puts a created or updated job into the inverted index. Call it after the route commits.
+        """
+        features = self.get_job_features_many([job])[0]
+        self.job_index.add_job(job.id, features.lemmas)
+        self.job_matrix.upsert(job.id, features.lemmas, features.vector)
+
+    def _sync_job_index(self):
+        """
+        Keeps the inverted index and the job matrix in line with job_features, which other workers may also write.
+        Loads everything on first use, afterwards only the rows updated since the last sync.
+        """
+        with self._job_index_lock:
+            state = self._job_index_state
+            if state is None:
+                # First use: backfill jobs that were never scored so the index is complete
+                unindexed = Job.query.outerjoin(JobFeature).filter(JobFeature.job_id.is_(None)).all()
+                if unindexed:
+                    self.get_job_features_many(unindexed)
+
+            count, latest = db.session.query(func.count(JobFeature.job_id), func.max(JobFeature.updated_at)).one()
+            if state == (count, latest):
+                return
+
+            query = db.session.query(JobFeature.job_id, JobFeature.lemmas, JobFeature.vector)
+            if state is not None and state[1] is not None:
+                rows = query.filter(JobFeature.updated_at >= state[1]).all()
+                for job_id, lemmas, vector in rows:
+                    lemmas = json.loads(lemmas) if lemmas else []
+                    self.job_index.add_job(job_id, lemmas)
+                    self.job_matrix.upsert(job_id, lemmas, self._decode_vector(vector))
+
+            if state is None or len(self.job_index) != count:
+                # First load, or jobs were deleted elsewhere: rebuild from scratch
+                self.job_index.clear()
+                rows = []
+                for job_id, lemmas, vector in query.all():
+                    lemmas = json.loads(lemmas) if lemmas else []
+                    self.job_index.add_job(job_id, lemmas)
+                    rows.append((job_id, lemmas, self._decode_vector(vector)))
+                self.job_matrix.rebuild(rows)
+
+            self._job_index_state = (count, latest)
+
+    def candidate_job_ids(self, profile, min_keyword_score=0.0):
+        """
+        Ids of the jobs sharing at least one core lemma with the profile, read from the inverted
+        index, keeping those whose keyword score (same curve as _keyword_scores) reaches min_keyword_score.
+        """
+        self._sync_job_index()
+        profile_features = self.get_profile_features(profile)
+        job_ids = []
+        for job_id, overlap in self.job_index.candidates(profile_features.lemmas).items():
+            core_size = self.job_index.core_size(job_id)
+            if core_size and min(overlap / core_size * 1.6, 1.0) >= min_keyword_score:
+                job_ids.append(job_id)
+        return job_ids
+
+    def _decode_job_features(self, feature):
+        lemmas = frozenset(json.loads(feature.lemmas)) if feature.lemmas else frozenset()
+        return JobFeatures(lemmas, self._decode_vector(feature.vector), self._lemma_ids(lemmas))
+
+    def _decode_vector(self, data):
+        return np.frombuffer(data, dtype=np.float32) if data else np.zeros(0, dtype=np.float32)
+
+    def _lemma_ids(self, lemmas):
+        """
+        Maps lemmas to integer ids in a shared vocabulary, used for the bitset keyword overlap.
+        """
+        with self._vocab_lock:
+            ids = [self._lemma_vocab.setdefault(lemma, len(self._lemma_vocab)) for lemma in lemmas]
+        return np.asarray(ids, dtype=np.int64)
+
+    def compute_profile_features(self, profile):
+        """
+        Runs spaCy over the profile once and returns its lemmas and document vector.
+        """
+        return self.compute_profile_features_many([profile])[0]
+
+    def compute_profile_features_many(self, profiles):
+        texts = []
+        for profile in profiles:
+            profile_text = self._construct_profile_text(profile)
+            texts.append((profile_text, profile_text))
+        return [ProfileFeatures(lemmas, vector) for lemmas, vector in self.extract_features_many(texts)]
+
+    def bump_profile_version(self, profile):
+        """
+        Marks the cached features of a profile as stale. Call it from every route that
+        edits the profile, its experiences or its educations, before committing.
+        """
+        feature = profile.feature
+        if feature is None:
+            feature = ProfileFeature(version=0)
+            profile.feature = feature
+        self._profile_cache.pop((profile.id, feature.version or 0))
+        feature.version = (feature.version or 0) + 1
+        feature.lemmas = None
+        feature.vector = None
+
+    def get_profile_features(self, profile):
+        """
+        Returns the features of the current profile version.
+        Served from the in-process LRU, then the persisted copy, then computed.
+        """
+        if profile is None:
+            return self.compute_profile_features(None)
+        return self.get_profile_features_many([profile])[0]
+
+    def get_profile_features_many(self, profiles):
+        """
+        Batch version of get_profile_features: one query for the stored rows, one parse
+        batch (pool-aware) for the misses and a single commit to persist them.
+        """
+        stored = {}
+        profile_ids = [profile.id for profile in profiles]
+        for start in range(0, len(profile_ids), 500):
+            for feature in ProfileFeature.query.filter(ProfileFeature.profile_id.in_(profile_ids[start:start + 500])).all():
+                stored[feature.profile_id] = feature
+
+        results = [None] * len(profiles)
+        missing = []
+        for i, profile in enumerate(profiles):
+            feature = stored.get(profile.id)
+            key = (profile.id, feature.version if feature is not None else 0)
+            features = self._profile_cache.get(key)
+            if features is None and feature is not None and feature.lemmas is not None and feature.vector is not None:
+                features = ProfileFeatures(
+                    frozenset(json.loads(feature.lemmas)),
+                    np.frombuffer(feature.vector, dtype=np.float32)
+                )
+                self._profile_cache.set(key, features)
+            if features is None:
+                missing.append(i)
+            results[i] = features
+
+        if not missing:
+            return results
+
+        computed = self.compute_profile_features_many([profiles[i] for i in missing])
+        for i, features in zip(missing, computed):
+            profile = profiles[i]
+            feature = stored.get(profile.id)
+            self._profile_cache.set((profile.id, feature.version if feature is not None else 0), features)
+            results[i] = features
+
+        if Config.PROFILE_FEATURE_PERSIST:
+            self._save_profile_features(
+                [(profiles[i].id, stored.get(profiles[i].id), features) for i, features in zip(missing, computed)]
+            )
+
+        return results
+
+    def _save_profile_features(self, rows):
+        """
+        Persists [(profile_id, stored ProfileFeature or None, features), ...]. Each write only
+        applies to the version the features were built from: if an edit bumped the version in
+        the meantime, the row is left cleared so the new text gets parsed.
+        """
+        now = datetime.utcnow()
+        try:
+            for profile_id, feature, features in rows:
+                values = {
+                    'lemmas': json.dumps(sorted(features.lemmas)),
+                    'vector': features.vector.tobytes(),
+                    'updated_at': now
+                }
+                if feature is not None:
+                    db.session.execute(
+                        update(ProfileFeature)
+                        .where(ProfileFeature.profile_id == profile_id, ProfileFeature.version == feature.version)
+                        .values(**values)
+                        .execution_options(synchronize_session=False)
+                    )
+                    continue
+                # No row yet: a concurrent first edit may create it, then its version wins
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(insert(ProfileFeature).values(profile_id=profile_id, version=0, **values))
+                except IntegrityError:
+                    pass
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error saving profile features: {e}")
+
+    def _keyword_scores(self, profile_features, job_features):
+        """
+        Vectorized keyword overlap: the profile lemmas become a bitset over the lemma
+        vocabulary and every job's core lemma ids are looked up in it at once.
+        """
+        n = len(job_features)
+        lengths = np.fromiter((len(f.lemma_ids) for f in job_features), dtype=np.int64, count=n)
+        if not lengths.any():
+            return np.zeros(n)
+        indices = np.concatenate([f.lemma_ids for f in job_features])
+
+        vocab = self._lemma_vocab
+        profile_ids = [vocab[lemma] for lemma in profile_features.lemmas if lemma in vocab]
+        bitset = np.zeros(max(len(vocab), int(indices.max()) + 1), dtype=bool)
+        bitset[profile_ids] = True
+
+        rows = np.repeat(np.arange(n), lengths)
+        overlap = np.bincount(rows, weights=bitset[indices], minlength=n)
+        raw_overlap = overlap / np.maximum(lengths, 1)
+
+        # CURVE THE SCORE:
+        # Matching 60% of tags is usually "Excellent". Matching 100% is rare.
+        # We multiply by 1.5 to boost good candidates (e.g., 0.6 -> 0.9).
+        return np.where(lengths > 0, np.minimum(raw_overlap * 1.6, 1.0), 0.0)
+
+    def _semantic_similarities(self, profile_features, job_features):
+        """
+        Cosine similarity of the profile vector against every job vector with a single
+        matrix-vector product (same result as spaCy's Doc.similarity).
+        """
+        n = len(job_features)
+        profile_vector = profile_features.vector
+        dims = profile_vector.size
+        profile_norm = np.linalg.norm(profile_vector) if dims else 0.0
+        if profile_norm == 0:
+            return np.zeros(n)
+
+        matrix = np.zeros((n, dims), dtype=np.float32)
+        for i, f in enumerate(job_features):
+            if f.vector.size == dims:
+                matrix[i] = f.vector
+
+        norms = np.linalg.norm(matrix, axis=1) * profile_norm
+        dots = matrix @ profile_vector
+        raw = np.divide(dots, norms, out=np.zeros(n, dtype=np.float32), where=norms > 0)
+        return raw.astype(np.float64)
+
+    def _combine_scores(self, keyword_score, raw_semantic):
+        """
+        Applies the weighting, penalty and boost curve to arrays of sub-scores.
+        """
+        return self._round_scores(self._final_scores(keyword_score, raw_semantic))
+
+    def _round_scores(self, final_score):
+        return [float(min(round(score * 100, 1), 98.0)) for score in final_score.tolist()]
+
+    def _semantic_scores(self, raw_semantic):
+        # Normalize Vector Score:
+        # Vectors are generous. 0.7 is a baseline for "Professional English".
+        # We map 0.6 -> 0.0 and 0.95 -> 1.0
+        return np.clip((raw_semantic - 0.6) * 2.5, 0, 1.0)
+
+    def _final_scores(self, keyword_score, raw_semantic):
+        """
+        Unrounded 0..1 scores, for callers that only need to rank before rounding.
+        """
+        semantic_score = self._semantic_scores(raw_semantic)
+
+        # --- 3. FINAL WEIGHTED SCORE ---
+        # If the candidate has the KEYWORDS, we trust them highly (65% weight).
+        # The Vector context helps separate good resumes from keyword stuffing (35% weight).
+        
+        final_score = (keyword_score * 0.65) + (semantic_score * 0.35)
+
+        # --- 4. ADJUSTMENTS ---
+        
+        # PENALTY: The "Nurse applying for SEO" case.
+        # If they miss almost ALL core keywords, the semantic score is likely a hallucination/noise.
+        final_score = np.where(keyword_score < 0.2, final_score * 0.4, final_score) # Crush the score.
+            
+        # BOOST: The "Expert" case.
+        # If they matched > 80% of tags (after curve), they are definitely a strong fit.
+        final_score = np.where(keyword_score > 0.8, np.maximum(final_score, 0.85), final_score)
+
+        return final_score
+
+    def score_many(self, profile, jobs):
+        """
+        Scores one profile against many jobs in a single vectorized pass.
+        Returns the scores in the same order as jobs, or None when scoring is unavailable
+        (no vectors in the loaded model, or an error): callers must not store that as a 0.
+        """
+        if not jobs:
+            return []
         try:
             if not self.nlp.has_pipe("tok2vec"):
-                return 0.0
+                return None
 
             # --- 1. CORE KEYWORD MATCH (The "Hard" Skills) ---
             # We derive the "Must Haves" strictly from Job Title and Tags.
             # We ignore the description body for this part to avoid noise.
-            
-            job_core_text = f"{job.title} {job.title}" # Double weight on title
-            if job.tags:
-                job_core_text += f" {job.tags.replace(',', ' ')}"
-            
-            job_core_lemmas = self._get_lemmas(job_core_text)
-            
-            # Profile "Searchable" text
-            profile_search_text = self._construct_profile_text(profile)
-            profile_lemmas = self._get_lemmas(profile_search_text)
-            
-            # Calculate Overlap
-            if not job_core_lemmas:
-                keyword_score = 0.0
-            else:
-                intersection = job_core_lemmas.intersection(profile_lemmas)
-                raw_overlap = len(intersection) / len(job_core_lemmas)
-                
-                # CURVE THE SCORE:
-                # Matching 60% of tags is usually "Excellent". Matching 100% is rare.
-                # We multiply by 1.5 to boost good candidates (e.g., 0.6 -> 0.9).
-                keyword_score = min(raw_overlap * 1.6, 1.0)
+            # Both sides come precomputed (see get_job_features_many / get_profile_features).
+            job_features = self.get_job_features_many(jobs)
+            profile_features = self.get_profile_features(profile)
+            keyword_score = self._keyword_scores(profile_features, job_features)
 
             # --- 2. SEMANTIC CONTEXT MATCH (The "Soft" Skills) ---
             # This uses the vectors to understand context (e.g. "Coding" ~ "Development")
-            
-            profile_vec_text = self._construct_profile_text(profile)
-            job_vec_text = self._construct_job_text_for_vector(job) # Includes description
+            # Job vector already includes the description
+            raw_semantic = self._semantic_similarities(profile_features, job_features)
 
-            doc_profile = self.nlp(profile_vec_text[:100000])
-            doc_job = self.nlp(job_vec_text[:100000])
-            
-            raw_semantic = doc_profile.similarity(doc_job)
-            
-            # Normalize Vector Score:
-            # Vectors are generous. 0.7 is a baseline for "Professional English".
-            # We map 0.6 -> 0.0 and 0.95 -> 1.0
-            semantic_score = max(0, (raw_semantic - 0.6) * 2.5)
-            semantic_score = min(semantic_score, 1.0)
-
-            # --- 3. FINAL WEIGHTED SCORE ---
-            # If the candidate has the KEYWORDS, we trust them highly (65% weight).
-            # The Vector context helps separate good resumes from keyword stuffing (35% weight).
-            
-            final_score = (keyword_score * 0.65) + (semantic_score * 0.35)
+            return self._combine_scores(keyword_score, raw_semantic)
 
-            # --- 4. ADJUSTMENTS ---
-            
-            # PENALTY: The "Nurse applying for SEO" case.
-            # If they miss almost ALL core keywords, the semantic score is likely a hallucination/noise.
-            if keyword_score < 0.2: 
-                final_score *= 0.4 # Crush the score.
-                
-            # BOOST: The "Expert" case.
-            # If they matched > 80% of tags (after curve), they are definitely a strong fit.
-            if keyword_score > 0.8:
-                final_score = max(final_score, 0.85)
-                
-            return float(min(round(final_score * 100, 1), 98.0))
+        except Exception as e:
+            print(f"Error calculating scores: {e}")
+            return None
+
+    def top_k(self, profile, jobs, k=5, min_score=None, block_size=256):
+        """
+        Returns the k best (job, score) pairs, best first, keeping only scores above min_score.
+        Keyword scores are cheap, and with a perfect semantic match they give an upper bound
+        on the final score. Jobs are visited in bound order and scanning stops as soon as no
+        remaining job can beat the current k-th score, so most jobs never get semantic scoring.
+        """
+        if not jobs or k <= 0:
+            return []
+        try:
+            if not self.nlp.has_pipe("tok2vec"):
+                # Every score is 0.0 without vectors
+                if min_score is not None and min_score >= 0:
+                    return []
+                return [(job, 0.0) for job in jobs[:k]]
+
+            job_features = self.get_job_features_many(jobs)
+            profile_features = self.get_profile_features(profile)
+            keyword_score = self._keyword_scores(profile_features, job_features)
+            upper_bounds = np.array(self._combine_scores(keyword_score, np.ones(len(jobs))))
+            order = np.argsort(-upper_bounds, kind='stable')
+
+            heap = [] # min-heap of (score, -position): ties keep the earlier job, like a stable sort
+            for start in range(0, len(order), block_size):
+                block = order[start:start + block_size]
+                best_bound = upper_bounds[block[0]]
+                if min_score is not None and best_bound <= min_score:
+                    break
+                if len(heap) == k and best_bound < heap[0][0]:
+                    break
+
+                raw_semantic = self._semantic_similarities(profile_features, [job_features[i] for i in block])
+                scores = self._combine_scores(keyword_score[block], raw_semantic)
+                for i, score in zip(block.tolist(), scores):
+                    if min_score is not None and score <= min_score:
+                        continue
+                    item = (score, -i)
+                    if len(heap) < k:
+                        heapq.heappush(heap, item)
+                    elif item > heap[0]:
+                        heapq.heapreplace(heap, item)
+
+            return [(jobs[-neg_i], score) for score, neg_i in sorted(heap, reverse=True)]
+
+        except Exception as e:
+            print(f"Error calculating top jobs: {e}")
+            return []
+
+    def rank_jobs(self, profile, limit=20, after=None, offset=0, job_ids=None):
+        """
+        Ranks the whole catalog for one profile from the stored job features (job matrix: one
+        bincount and one matrix-vector product, no job rows loaded or re-hashed). Order is best
+        score first, then newest (highest id) first.
+
+        Returns ([(job_id, score), ...], has_more, last) for the page that starts after the
+        (score, job_id) keyset `after`, or at `offset`; `last` is the keyset of the page's last
+        row (unrounded score). job_ids restricts the ranking to those jobs (e.g. search hits).
+        None when scoring is unavailable.
+        """
+        try:
+            if not self.nlp.has_pipe("tok2vec"):
+                return None
+            self._sync_job_index()
+            profile_features = self.get_profile_features(profile)
+            row_ids, overlap, raw_semantic, core_sizes = self.job_matrix.score_inputs(
+                profile_features.lemmas, profile_features.vector
+            )
+        except Exception as e:
+            print(f"Error ranking jobs: {e}")
+            return None
+
+        if job_ids is not None:
+            keep = np.isin(row_ids, np.fromiter(job_ids, dtype=np.int64))
+            row_ids, overlap, raw_semantic, core_sizes = row_ids[keep], overlap[keep], raw_semantic[keep], core_sizes[keep]
+        job_ids = row_ids
+
+        # Same curve as _keyword_scores, per job core size
+        keyword_score = np.where(core_sizes > 0, np.minimum(overlap / np.maximum(core_sizes, 1) * 1.6, 1.0), 0.0)
+        # Ranked on the unrounded scores (rounding is monotonic); only the page gets rounded
+        scores = self._final_scores(keyword_score, raw_semantic)
+
+        if after is not None:
+            after_score, after_id = after
+            keep = (scores < after_score) | ((scores == after_score) & (job_ids < after_id))
+            job_ids, scores = job_ids[keep], scores[keep]
+
+        # Best score first, ties by highest id (lexsort: last key is the primary one)
+        order = np.lexsort((-job_ids, -scores))[offset:offset + limit + 1]
+        page = order[:limit]
+        return list(zip(job_ids[page].tolist(), self._round_scores(scores[page]))), len(order) > limit, \
+            (float(scores[page[-1]]), int(job_ids[page[-1]])) if len(page) else None
+
+    def calculate_score(self, profile, job):
+        scores = self.score_many(profile, [job])
+        return scores[0] if scores else 0.0
+
+    def _sync_profile_matrix(self, limit=None):
+        """
+        Brings the candidate matrix in line with the candidate profiles: removed candidates are
+        dropped, and new ones or ones whose feature version changed (bump_profile_version) are
+        parsed in pool-aware batches and upserted with the features computed here. Stored
+        feature rows are only a shortcut, so this works with PROFILE_FEATURE_PERSIST off.
+
+        With a limit, nothing is parsed when more candidates than that changed. Returns the
+        number of candidates still missing from the matrix. Callers hold _profile_matrix_lock.
+        """
+        current = dict(
+            db.session.query(Profile.id, func.coalesce(ProfileFeature.version, 0))
+            .join(User, Profile.user_id == User.id)
+            .outerjoin(ProfileFeature, ProfileFeature.profile_id == Profile.id)
+            .filter(User.role == 'candidate')
+            .all()
+        )
+        for profile_id in [profile_id for profile_id in self._profile_matrix_versions if profile_id not in current]:
+            self.profile_matrix.remove(profile_id)
+            del self._profile_matrix_versions[profile_id]
+
+        changed = [profile_id for profile_id, version in current.items() if self._profile_matrix_versions.get(profile_id) != version]
+        self._profile_matrix_pending = len(changed)
+        if limit is not None and len(changed) > limit:
+            return len(changed)
+
+        for start in range(0, len(changed), 500):
+            profiles = (Profile.query.filter(Profile.id.in_(changed[start:start + 500]))
+                        .options(selectinload(Profile.experiences)).all())
+            for profile, features in zip(profiles, self.get_profile_features_many(profiles)):
+                self.profile_matrix.upsert(profile.id, features.lemmas, features.vector)
+                # The version read above: an edit after it shows up as a change on the next sync
+                self._profile_matrix_versions[profile.id] = current[profile.id]
+            self._profile_matrix_pending = max(len(changed) - start - 500, 0)
+        return 0
+
+    def rank_profiles(self, job, limit=20, offset=0):
+        """
+        Reverse matching: scores every candidate profile against one job in a single batched
+        pass (bincount over the lemma index + one matrix-vector product) and returns
+        (total, [(profile_id, score), ...], pending) for the requested page, best first.
+
+        A few edited candidates are re-parsed inline; a larger backlog (first call after start,
+        bulk imports) is handed to the background warm-up and `pending` candidates are not ranked yet.
+        """
+        if not self.nlp.has_pipe("tok2vec"):
+            return 0, [], 0
+
+        if self._profile_matrix_lock.acquire(blocking=False):
+            try:
+                pending = self._sync_profile_matrix(limit=Config.PROFILE_MATRIX_INLINE_LIMIT)
+            finally:
+                self._profile_matrix_lock.release()
+        else:
+            # A warm-up is filling the matrix: rank what is there
+            pending = self._profile_matrix_pending
+        if pending:
+            self.warm_profile_matrix()
+
+        job_features = self.get_job_features_many([job])[0]
+        profile_ids, overlap, raw_semantic, _ = self.profile_matrix.score_inputs(job_features.lemmas, job_features.vector)
+        total = len(profile_ids)
+        if total == 0 or offset >= total:
+            return total, [], pending
+
+        # Same curve as _keyword_scores, with the job's core lemmas fixed
+        core_size = len(job_features.lemmas)
+        keyword_score = np.minimum(overlap / core_size * 1.6, 1.0) if core_size else np.zeros(total)
+        final_score = self._final_scores(keyword_score, raw_semantic)
 
+        # Only the rows up to the end of the requested page need sorting
+        needed = min(offset + limit, total)
+        if needed < total:
+            top = np.argpartition(-final_score, needed - 1)[:needed]
+        else:
+            top = np.arange(total)
+        top = top[np.argsort(-final_score[top], kind='stable')][offset:needed]
+
+        scores = self._round_scores(final_score[top])
+        return total, list(zip(profile_ids[top].tolist(), scores)), pending
+
+    def explain(self, profile, job, score):
+        """
+        Match explanation for one pair with the configured EXPLANATION_ENGINE: 'local' (default) never
+        waits on the LLM for more than the polish timeout, 'llm' asks the model for the whole explanation.
+        """
+        if Config.EXPLANATION_ENGINE == 'llm':
+            return self.generate_explanation(profile, job, score)
+        return self.local_explanation(profile, job, score, polish=Config.EXPLANATION_POLISH)
+
+    def local_explanation(self, profile, job, score=None, polish=False):
+        """
+        Deterministic explanation in the same JSON shape as generate_explanation, derived from what
+        scoring already computes: the job-core lemmas the profile has or lacks and the keyword and
+        semantic sub-scores. With polish, the LLM may reword the verdict sentence.
+        """
+        try:
+            if not self.nlp.has_pipe("tok2vec"):
+                # Same guard as score_many: a blank or fallback model yields no usable features
+                return self._generic_explanation(score or 0.0)
+
+            job_features = self.get_job_features_many([job])
+            profile_features = self.get_profile_features(profile)
+            keyword_score = self._keyword_scores(profile_features, job_features)
+            raw_semantic = self._semantic_similarities(profile_features, job_features)
+            if score is None:
+                score = self._combine_scores(keyword_score, raw_semantic)[0]
+            semantic_score = float(self._semantic_scores(raw_semantic)[0])
+
+            job_lemmas = {lemma for lemma in job_features[0].lemmas if lemma.strip()}
+            profile_lemmas = {lemma for lemma in profile_features.lemmas if lemma.strip()}
+            if not job_lemmas or not profile_lemmas:
+                return self._generic_explanation(score)
+            matched = sorted(job_lemmas & profile_lemmas)
+            missing = sorted(job_lemmas - profile_lemmas)
+        except Exception as e:
+            print(f"Error generating local explanation: {e}")
+            return json.dumps({
+                "strengths": ["Analysis failed"],
+                "missing": ["Analysis failed"],
+                "verdict": "Could not generate explanation."
+            })
+
+        strengths = [f"Mentions {lemma}" for lemma in matched[:3]]
+        if semantic_score >= 0.5:
+            strengths.append("Background closely related to the role")
+        if not strengths:
+            strengths = ["General professional background"]
+
+        gaps = [f"No mention of {lemma}" for lemma in missing[:4]] or ["No core requirement missing"]
+
+        relation = "closely" if semantic_score >= 0.66 else "somewhat" if semantic_score >= 0.33 else "loosely"
+        coverage = f"the profile covers {len(matched)} of {len(job_lemmas)} core requirements from the job title and tags"
+        verdict = f"{self._match_level(score)}: {coverage}, and the overall background is {relation} related to the role."
+
+        if polish:
+            verdict = self._polish_verdict(verdict, job.title, score)
+
+        return json.dumps({
+            "strengths": strengths[:4],
+            "missing": gaps,
+            "verdict": verdict
+        })
+
+    def _match_level(self, score):
+        if score >= 75:
+            return "Strong match"
+        if score >= 50:
+            return "Partial match"
+        return "Weak match"
+
+    def _generic_explanation(self, score):
+        """
+        Explanation when there are no usable features to compare (no vectors, empty job or profile text).
+        """
+        return json.dumps({
+            "strengths": ["General professional background"],
+            "missing": ["Not enough detail in the profile or job to compare requirements"],
+            "verdict": f"{self._match_level(score)}: there is not enough detail to compare the profile with the role's requirements."
+        })
+
+    def _polish_verdict(self, verdict, job_title, score):
+        """
+        Lets the LLM reword the verdict, waiting at most EXPLANATION_POLISH_TIMEOUT.
+        On timeout or error the local sentence is kept; a late answer still lands in the LLM cache.
+        """
+        system_prompt = """
+        You are an expert HR Recruiter. Polish the verdict sentence of a candidate match analysis.
+        Keep its meaning and facts. Answer with the single rewritten sentence only, no markdown.
+        """
+        user_prompt = f"Job: {job_title}\nMatch score: {score}/100\nVerdict: {verdict}"
+
+        if self._polish_pool is None:
+            self._polish_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='polish')
+        future = self._polish_pool.submit(llm_service.generate_text, system_prompt, user_prompt, task='explanation_polish')
+        try:
+            polished = future.result(timeout=Config.EXPLANATION_POLISH_TIMEOUT).strip()
         except Exception as e:
-            print(f"Error calculating score: {e}")
-            return 0.0
+            print(f"Keeping local verdict, polish failed or timed out: {e!r}")
+            return verdict
+        # Anything that is not a single short sentence is an error or fallback text
+        if not polished or "\n" in polished or len(polished) > 400:
+            return verdict
+        return polished
 
     def generate_explanation(self, profile, job, score):
         # Using the same construction logic as calculation for consistency
-        profile_text = self._construct_profile_text(profile)
-        job_text = self._construct_job_text_for_vector(job)
-        
+        # Compacted to the task's token budget (repeated skills/titles are only sent once)
+        sections = PromptBuilder('explanation') \
+            .add('profile', self._construct_profile_text(profile)) \
+            .add('job', self._construct_job_text_for_vector(job)) \
+            .build()
+        return self._explain_texts(sections['profile'], sections['job'], score)
+
+    def _explain_texts(self, profile_text, job_text, score):
         system_prompt = f"""
         You are an expert HR Recruiter. 
         Compare the candidate profile and the job description.
@@ -160,10 +984,10 @@ class MatchingService:
         - "verdict": A 1-sentence summary of why this score was given.
         """
         
-        user_prompt = f"CANDIDATE PROFILE:\n{profile_text[:3000]}\n\nJOB DESCRIPTION:\n{job_text[:3000]}"
+        user_prompt = f"CANDIDATE PROFILE:\n{profile_text}\n\nJOB DESCRIPTION:\n{job_text}"
         
         try:
-            response_text = llm_service.generate_text(system_prompt, user_prompt)
+            response_text = llm_service.generate_text(system_prompt, user_prompt, task='explanation')
             if "```" in response_text:
                 response_text = response_text.replace("```json", "").replace("```", "")
             return response_text
@@ -175,4 +999,98 @@ class MatchingService:
                 "verdict": "Could not generate explanation."
             })
 
+    def generate_explanations_many(self, job, candidates, batch_size=None, concurrency=None):
+        """
+        Explains many candidates for one job: candidates is [(key, profile, score)], returns {key: JSON string}.
+        Packs batch_size candidates into one prompt (the job text is sent once per batch) and runs up to
+        `concurrency` batches at a time. Candidates missing from a batch answer are explained one by one.
+        """
+        batch_size = max(batch_size or Config.EXPLANATION_BATCH_SIZE, 1)
+        concurrency = max(concurrency or Config.EXPLANATION_CONCURRENCY, 1)
+
+        # Texts are built here, on the caller's thread, so the pool never touches ORM objects
+        job_text = self._construct_job_text_for_vector(job)
+        items = [
+            (key, self._construct_profile_text(profile), score)
+            for key, profile, score in candidates
+        ]
+        batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+
+        explanations = {}
+        if not batches:
+            return explanations
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(batches)), thread_name_prefix='explanations') as pool:
+            for batch_explanations in pool.map(lambda batch: self._explain_batch(job_text, batch), batches):
+                explanations.update(batch_explanations)
+        return explanations
+
+    def _explain_batch(self, job_text, batch):
+        system_prompt = """
+        You are an expert HR Recruiter. Write match explanations for several candidates applying to the same job.
+        Compare each candidate profile with the job description, taking its calculated match score into account.
+        
+        Provide a strict JSON object (no markdown) keyed by candidate id, where each value has:
+        - "strengths": List of anywhere between 1 to 4 matching skills or experiences (if score is high, then more points here).
+        - "missing": List of anywhere between 1 to 4 key requirements missing from the profile (if score is low, then more points here).
+        - "verdict": A 1-sentence summary of why this score was given.
+        """
+
+        # One budget for the whole batch; the shared job text gets a double share
+        prompt = PromptBuilder('explanation_batch').add('job', job_text, weight=2.0)
+        for idx, (_, profile_text, _) in enumerate(batch, start=1):
+            prompt.add(idx, profile_text)
+        sections = prompt.build()
+        job_text = sections['job']
+        batch = [(key, sections[idx], score) for idx, (key, _, score) in enumerate(batch, start=1)]
+
+        user_prompt = f"JOB DESCRIPTION:\n{job_text}\n\n" + "\n\n".join(
+            f"CANDIDATE {idx} (match score {score}/100):\n{profile_text}"
+            for idx, (_, profile_text, score) in enumerate(batch, start=1)
+        )
+
+        parsed = {}
+        try:
+            response_text = llm_service.generate_text(system_prompt, user_prompt, task='explanation_batch')
+            if "```" in response_text:
+                response_text = response_text.replace("```json", "").replace("```", "")
+            parsed = json.loads(response_text)
+            if not isinstance(parsed, dict):
+                parsed = {}
+        except Exception as e:
+            print(f"Error generating batched explanations: {e}")
+
+        explanations = {}
+        for idx, (key, profile_text, score) in enumerate(batch, start=1):
+            entry = parsed.get(str(idx))
+            if isinstance(entry, dict) and all(field in entry for field in ('strengths', 'missing', 'verdict')):
+                explanations[key] = json.dumps({
+                    'strengths': entry['strengths'],
+                    'missing': entry['missing'],
+                    'verdict': entry['verdict']
+                })
+            else:
+                explanations[key] = self._explain_texts(profile_text, job_text, score)
+        return explanations
+
+    def explain_applications(self, job, overwrite=False):
+        """
+        Generates the match explanation of every application to a job in batches and bulk-writes them.
+        Applications that already have one are skipped unless overwrite is set. Returns how many were written.
+        """
+        query = Application.query.filter(Application.job_id == job.id) \
+            .options(selectinload(Application.user).selectinload(User.profile).selectinload(Profile.experiences))
+        if not overwrite:
+            query = query.filter(Application.match_explanation.is_(None))
+        applications = query.all()
+
+        explanations = self.generate_explanations_many(
+            job, [(app.id, app.user.profile, app.match_score) for app in applications]
+        )
+        if explanations:
+            db.session.execute(update(Application), [
+                {'id': app_id, 'match_explanation': explanation} for app_id, explanation in explanations.items()
+            ])
+            db.session.commit()
+        return len(explanations)
+
 matching_service = MatchingService()
\ No newline at end of file
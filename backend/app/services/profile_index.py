@@ -0,0 +1,152 @@
+import threading
+from collections import defaultdict
+import numpy as np
+
+class ProfileMatrix:
+    """
+    Precomputed candidate-side data for reverse matching: a contiguous float32 matrix of
+    profile vectors (one row per profile) plus an inverted index from lemma to rows.
+    Scoring one job against every profile is then a bincount and a matrix-vector product.
+    The same layout with one row per job ranks the catalog for a profile (MatchingService.job_matrix).
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._profile_ids = np.zeros(0, dtype=np.int64) # row -> profile_id
+            self._rows = {} # profile_id -> row
+            self._row_lemmas = [] # row -> frozenset of lemmas
+            self._postings = defaultdict(set) # lemma -> {row}
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+            self._norms = np.zeros(0, dtype=np.float32)
+            self._sizes = np.zeros(0, dtype=np.int64) # row -> number of lemmas
+            self._size = 0
+
+    def rebuild(self, rows):
+        """
+        Replaces the whole matrix from (profile_id, lemmas, vector) rows in one pass.
+        """
+        rows = list(rows)
+        dims = max((vector.size for _, _, vector in rows), default=0)
+        capacity = max(1024, len(rows))
+        vectors = np.zeros((capacity, dims), dtype=np.float32)
+        profile_ids = np.zeros(capacity, dtype=np.int64)
+        sizes = np.zeros(capacity, dtype=np.int64)
+        postings = defaultdict(set)
+        row_lemmas = []
+        for row, (profile_id, lemmas, vector) in enumerate(rows):
+            profile_ids[row] = profile_id
+            if vector.size == dims:
+                vectors[row] = vector
+            lemmas = frozenset(lemmas)
+            sizes[row] = len(lemmas)
+            row_lemmas.append(lemmas)
+            for lemma in lemmas:
+                postings[lemma].add(row)
+
+        with self._lock:
+            self._profile_ids = profile_ids
+            self._rows = {profile_id: row for row, (profile_id, _, _) in enumerate(rows)}
+            self._row_lemmas = row_lemmas
+            self._postings = postings
+            self._vectors = vectors
+            self._norms = np.linalg.norm(vectors, axis=1).astype(np.float32)
+            self._sizes = sizes
+            self._size = len(rows)
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self, dims):
+        capacity = max(1024, len(self._vectors) * 2)
+        vectors = np.zeros((capacity, dims), dtype=np.float32)
+        if self._size:
+            vectors[:self._size] = self._vectors[:self._size]
+        self._vectors = vectors
+        norms = np.zeros(capacity, dtype=np.float32)
+        norms[:self._size] = self._norms[:self._size]
+        self._norms = norms
+        profile_ids = np.zeros(capacity, dtype=np.int64)
+        profile_ids[:self._size] = self._profile_ids[:self._size]
+        self._profile_ids = profile_ids
+        sizes = np.zeros(capacity, dtype=np.int64)
+        sizes[:self._size] = self._sizes[:self._size]
+        self._sizes = sizes
+
+    def upsert(self, profile_id, lemmas, vector):
+        with self._lock:
+            lemmas = frozenset(lemmas)
+            dims = self._vectors.shape[1] if self._size else vector.size
+            row = self._rows.get(profile_id)
+            if row is None:
+                if self._size == len(self._vectors) or self._vectors.shape[1] != dims:
+                    self._grow(dims)
+                row = self._size
+                self._size += 1
+                self._rows[profile_id] = row
+                self._profile_ids[row] = profile_id
+                self._row_lemmas.append(frozenset())
+
+            for lemma in self._row_lemmas[row] - lemmas:
+                self._postings[lemma].discard(row)
+            for lemma in lemmas - self._row_lemmas[row]:
+                self._postings[lemma].add(row)
+            self._row_lemmas[row] = lemmas
+            self._sizes[row] = len(lemmas)
+
+            if vector.size == dims:
+                self._vectors[row] = vector
+                self._norms[row] = np.linalg.norm(vector)
+            else:
+                self._vectors[row] = 0
+                self._norms[row] = 0
+
+    def remove(self, profile_id):
+        """
+        Drops a profile; the last row moves into its slot so rows stay contiguous.
+        """
+        with self._lock:
+            row = self._rows.pop(profile_id, None)
+            if row is None:
+                return
+            for lemma in self._row_lemmas[row]:
+                self._postings[lemma].discard(row)
+            last = self._size - 1
+            if row != last:
+                moved_id = int(self._profile_ids[last])
+                moved_lemmas = self._row_lemmas[last]
+                for lemma in moved_lemmas:
+                    self._postings[lemma].discard(last)
+                    self._postings[lemma].add(row)
+                self._vectors[row] = self._vectors[last]
+                self._norms[row] = self._norms[last]
+                self._profile_ids[row] = moved_id
+                self._sizes[row] = self._sizes[last]
+                self._row_lemmas[row] = moved_lemmas
+                self._rows[moved_id] = row
+            self._row_lemmas.pop()
+            self._vectors[last] = 0
+            self._norms[last] = 0
+            self._sizes[last] = 0
+            self._size = last
+
+    def score_inputs(self, job_lemmas, job_vector):
+        """
+        Returns (profile_ids, overlap_counts, raw_semantic, lemma_counts) over every row for one
+        set of lemmas and vector; lemma_counts are the rows' own lemma counts.
+        """
+        with self._lock:
+            n = self._size
+            rows = [np.fromiter(self._postings[lemma], dtype=np.int64) for lemma in job_lemmas if self._postings.get(lemma)]
+            overlap = np.bincount(np.concatenate(rows), minlength=n) if rows else np.zeros(n, dtype=np.int64)
+
+            raw_semantic = np.zeros(n, dtype=np.float32)
+            job_norm = np.linalg.norm(job_vector) if job_vector.size else 0.0
+            if n and job_norm > 0 and job_vector.size == self._vectors.shape[1]:
+                norms = self._norms[:n] * job_norm
+                dots = self._vectors[:n] @ job_vector
+                np.divide(dots, norms, out=raw_semantic, where=norms > 0)
+
+            return self._profile_ids[:n].copy(), overlap, raw_semantic.astype(np.float64), self._sizes[:n].copy()
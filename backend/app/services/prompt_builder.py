@@ -0,0 +1,161 @@
+import re
+from collections import Counter
+from ..config import Config
+from .llm_service import llm_service
+
+# Rough size of a token for English prose; good enough to budget prompts without a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Lines that cost tokens without telling the model anything about the candidate or the role
+BOILERPLATE_PATTERNS = [re.compile(pattern, re.I) for pattern in (
+    r'equal opportunity employer',
+    r'all qualified applicants will receive consideration',
+    r'^(apply now|click here to apply|how to apply)\b',
+    r'^(about us|about the company)\s*:?$',
+)]
+
+SUMMARY_STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the their this to was "
+    "were will with we you our your they he she his her not but also very more".split()
+)
+
+# Room kept for the "(+N more ...)" line that stands in for dropped segments
+SUMMARY_TOKENS = 24
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+class _Section:
+    def __init__(self, name, segments, weight, original_tokens, noun, joiner):
+        self.name = name
+        self.segments = segments
+        self.weight = weight
+        self.original_tokens = original_tokens
+        self.noun = noun
+        self.joiner = joiner
+        self.tokens = sum(estimate_tokens(segment) + 1 for segment in segments)
+
+class PromptBuilder:
+    """
+    Assembles the variable parts of a prompt within the task's token budget (PROMPT_TOKEN_BUDGETS).
+
+    Every section is compacted first: boilerplate lines are stripped and repeated segments
+    (the profile text repeats skills and titles for vector weight) are kept once. If the sections
+    still exceed the budget, it is split by weight, each section keeps its leading segments
+    and the overflow is summarized as a short keyword line. Sections should be added with their
+    most important content first.
+    """
+    def __init__(self, task, budget=None):
+        self.task = task
+        self.budget = budget or Config.PROMPT_TOKEN_BUDGETS.get(task, Config.PROMPT_TOKEN_BUDGET_DEFAULT)
+        self._sections = []
+        self.original_tokens = 0
+        self.final_tokens = 0
+
+    def add(self, name, text, weight=1.0):
+        """Adds free text, split into sentence-like segments."""
+        text = text or ""
+        segments = [segment.strip() for segment in re.split(r'(?<=[.!?])\s+|\n+', text)]
+        self._add(name, segments, weight, estimate_tokens(text), 'more details', ' ')
+        return self
+
+    def add_items(self, name, items, weight=1.0, noun='more items'):
+        """Adds a list of items (e.g. review comments), ranked best first by the caller."""
+        items = [str(item) for item in items if item]
+        self._add(name, [item.strip() for item in items], weight, sum(estimate_tokens(item) + 1 for item in items), noun, '\n')
+        return self
+
+    def _add(self, name, segments, weight, original_tokens, noun, joiner):
+        kept, seen = [], set()
+        for segment in segments:
+            if not segment or any(pattern.search(segment) for pattern in BOILERPLATE_PATTERNS):
+                continue
+            key = re.sub(r'\s+', ' ', segment.lower()).strip(' .,;:!?')
+            if key in seen:
+                continue
+            seen.add(key)
+            kept.append(segment)
+        self._sections.append(_Section(name, kept, weight, original_tokens, noun, joiner))
+
+    def build(self):
+        """
+        Returns {name: compacted text} and records the tokens saved in the LLM metrics.
+        Items sections are joined with newlines, text sections with spaces.
+        """
+        allowances = self._allocate()
+        result = {}
+        for section in self._sections:
+            result[section.name] = self._fit(section, allowances[section.name])
+
+        self.original_tokens = sum(section.original_tokens for section in self._sections)
+        self.final_tokens = sum(estimate_tokens(text) for text in result.values())
+        llm_service.metrics.record_prompt(self.task, self.original_tokens, self.final_tokens)
+        return result
+
+    @property
+    def saved_tokens(self):
+        return max(self.original_tokens - self.final_tokens, 0)
+
+    def _allocate(self):
+        """
+        Water-filling split of the budget: sections that need less than their weighted share
+        keep everything and the rest is shared again among the larger ones.
+        """
+        allowances = {}
+        pending = list(self._sections)
+        remaining = self.budget
+        while pending:
+            total_weight = sum(section.weight for section in pending) or 1.0
+            small = [s for s in pending if s.tokens <= remaining * s.weight / total_weight]
+            if not small:
+                for section in pending:
+                    allowances[section.name] = int(remaining * section.weight / total_weight)
+                break
+            for section in small:
+                allowances[section.name] = section.tokens
+                remaining -= section.tokens
+                pending.remove(section)
+        return allowances
+
+    def _fit(self, section, allowance):
+        if section.tokens <= allowance:
+            return section.joiner.join(section.segments)
+
+        kept, used = [], 0
+        room = max(allowance - SUMMARY_TOKENS, 0)
+        for segment in section.segments:
+            cost = estimate_tokens(segment) + 1
+            if used + cost > room:
+                break
+            kept.append(segment)
+            used += cost
+
+        if not kept and section.segments and room:
+            # Not even the first segment fits: cut it at a word boundary
+            cut = section.segments[0][:room * CHARS_PER_TOKEN].rsplit(' ', 1)[0]
+            kept.append(cut + '...')
+            dropped = section.segments[1:]
+        else:
+            dropped = section.segments[len(kept):]
+
+        summary = self._summarize(dropped, section.noun)
+        return section.joiner.join(kept + ([summary] if summary else []))
+
+    def _summarize(self, dropped, noun):
+        """
+        Extractive stand-in for the dropped segments: how many there were and their most frequent terms.
+        """
+        if not dropped:
+            return ""
+        words = Counter(
+            word for segment in dropped
+            for word in re.findall(r"[a-z][a-z0-9+#.\-]{2,}", segment.lower())
+            if word not in SUMMARY_STOP_WORDS
+        )
+        summary = f"(+{len(dropped)} {noun}"
+        terms = []
+        for word, _ in words.most_common(8):
+            if estimate_tokens(summary + ': ' + ', '.join(terms + [word]) + ')') > SUMMARY_TOKENS:
+                break
+            terms.append(word.strip('.'))
+        return summary + (': ' + ', '.join(terms) if terms else '') + ')'
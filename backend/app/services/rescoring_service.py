@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import defaultdict
+from sqlalchemy import update
+from sqlalchemy.orm import selectinload
+from ..database import db
+from ..models import Application, Job, Profile
+from .matching_service import matching_service
+from .application_counts import application_counts
+
+class RescoringService:
+    """
+    Keeps Application.match_score fresh when a job or a candidate profile changes.
+    Routes enqueue the change after they commit; only the affected applications are queued,
+    and a background thread scores them in batches with score_many and writes them back in bulk.
+    """
+    def __init__(self):
+        self._app = None
+        self.enabled = True
+        self.batch_size = 200
+        self.delay = 2.0
+        self._pending = {} # application_id -> (user_id, job_id)
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def init_app(self, app):
+        self._app = app
+        self.enabled = app.config.get('RESCORING_ENABLED', True)
+        self.batch_size = app.config.get('RESCORING_BATCH_SIZE', 200)
+        self.delay = app.config.get('RESCORING_DELAY', 2.0)
+
+    def enqueue_job(self, job_id):
+        """Queues every application to a job whose matching text changed."""
+        if not self.enabled:
+            return
+        rows = db.session.query(Application.id, Application.user_id, Application.job_id) \
+            .filter(Application.job_id == job_id).all()
+        self._enqueue(rows)
+
+    def enqueue_profile(self, profile):
+        """Queues every application of a candidate whose profile changed."""
+        if not self.enabled or profile is None:
+            return
+        rows = db.session.query(Application.id, Application.user_id, Application.job_id) \
+            .filter(Application.user_id == profile.user_id).all()
+        self._enqueue(rows)
+
+    def _enqueue(self, rows):
+        if not rows:
+            return
+        with self._cond:
+            for app_id, user_id, job_id in rows:
+                self._pending[app_id] = (user_id, job_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='rescoring', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # Let a burst of edits coalesce before scoring
+            time.sleep(self.delay)
+            with self._cond:
+                pending, self._pending = self._pending, {}
+
+            items = list(pending.items())
+            with self._app.app_context():
+                for start in range(0, len(items), self.batch_size):
+                    try:
+                        self.rescore(items[start:start + self.batch_size])
+                    except Exception as e:
+                        db.session.rollback()
+                        print(f"Error re-scoring applications: {e}")
+                db.session.remove()
+
+    def rescore(self, items):
+        """
+        Scores [(application_id, (user_id, job_id)), ...] grouped by candidate and writes the new
+        scores back. Cached match explanations of these pairs are cleared.
+        """
+        by_user = defaultdict(list)
+        for app_id, (user_id, job_id) in items:
+            by_user[user_id].append((app_id, job_id))
+
+        profiles = {
+            profile.user_id: profile for profile in
+            Profile.query.filter(Profile.user_id.in_(by_user.keys())).options(selectinload(Profile.experiences)).all()
+        }
+        job_ids = {job_id for _, (_, job_id) in items}
+        jobs = {job.id: job for job in Job.query.filter(Job.id.in_(job_ids)).all()}
+
+        # Status and score as read now; _write_score only applies a score over exactly these values
+        current = {
+            app_id: (status, score) for app_id, status, score in
+            db.session.query(Application.id, Application.status, Application.match_score)
+            .filter(Application.id.in_([app_id for app_id, _ in items]))
+        }
+
+        written = 0
+        for user_id, user_apps in by_user.items():
+            user_apps = [(app_id, jobs[job_id]) for app_id, job_id in user_apps if job_id in jobs and app_id in current]
+            scores = matching_service.score_many(profiles.get(user_id), [job for _, job in user_apps])
+            if scores is None:
+                # Scoring unavailable: keep the stored scores, explanations and counters
+                print(f"Skipped re-scoring {len(user_apps)} applications of user {user_id}: scoring unavailable")
+                continue
+            for (app_id, job), score in zip(user_apps, scores):
+                written += self._write_score(app_id, job.id, current[app_id], score)
+
+        if written:
+            db.session.commit()
+        return written
+
+    def _write_score(self, app_id, job_id, read, score, attempts=3):
+        """
+        Writes one score with an UPDATE guarded by the status and score it was read with, and moves
+        the qualified counter only when that UPDATE hit the row. A status change or another
+        rescore that got there first makes the guard miss: the row is re-read and the write retried,
+        so the counter always moves from the value actually replaced. Returns 1 if written.
+        """
+        status, old_score = read
+        for _ in range(attempts):
+            same_score = Application.match_score.is_(None) if old_score is None else Application.match_score == old_score
+            result = db.session.execute(
+                update(Application)
+                .where(Application.id == app_id, Application.status == status, same_score)
+                .values(match_score=score, match_explanation=None)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                application_counts.rescored(job_id, status, old_score, score)
+                return 1
+            row = db.session.query(Application.status, Application.match_score).filter(Application.id == app_id).first()
+            if row is None:
+                # Withdrawn meanwhile
+                return 0
+            status, old_score = row
+        print(f"Skipped re-scoring application {app_id}: it kept changing")
+        return 0
+
+rescoring_service = RescoringService()
@@ -0,0 +1,150 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from ..config import Config
+from .matching_service import matching_service
+
+class _ScopeIndex:
+    """
+    Unit-length prompt vectors of one scope in a growable matrix; a lookup is one matrix-vector product.
+    Freed rows are zeroed (they can never score above the threshold) and reused.
+    """
+    def __init__(self, dims):
+        self.vectors = np.zeros((16, dims), dtype=np.float32)
+        self.entry_ids = [None] * 16
+        self.free = list(range(15, -1, -1))
+
+    def add(self, vector, entry_id):
+        if not self.free:
+            size = len(self.entry_ids)
+            self.vectors = np.vstack([self.vectors, np.zeros_like(self.vectors)])
+            self.entry_ids.extend([None] * size)
+            self.free = list(range(2 * size - 1, size - 1, -1))
+        slot = self.free.pop()
+        self.vectors[slot] = vector
+        self.entry_ids[slot] = entry_id
+        return slot
+
+    def remove(self, slot):
+        self.vectors[slot] = 0
+        self.entry_ids[slot] = None
+        self.free.append(slot)
+
+    def best(self, vector):
+        similarities = self.vectors @ vector
+        slot = int(np.argmax(similarities))
+        return slot, float(similarities[slot])
+
+    def __len__(self):
+        return len(self.entry_ids) - len(self.free)
+
+class SemanticAnswerCache:
+    """
+    Answers keyed by meaning instead of exact text: a prompt whose spaCy vector is within
+    `threshold` cosine similarity of a cached prompt in the same scope, and which shares enough of
+    its content lemmas, gets the cached answer. Scopes keep answers from leaking between contexts
+    and users (see chat routes). Entries expire after `ttl` and the least recently used ones are
+    evicted beyond `maxsize`.
+    """
+    def __init__(self, embed, maxsize=1000, ttl=86400, threshold=0.92, min_lemmas=2, min_overlap=0.5):
+        self.embed = embed # text -> (lemmas, vector)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self.min_lemmas = min_lemmas
+        self.min_overlap = min_overlap
+        self._scopes = {}
+        self._entries = OrderedDict() # entry_id -> (scope, slot, lemmas, answer, expires_at), LRU order
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'skipped': 0, 'stores': 0, 'evictions': 0}
+
+    def _features(self, prompt):
+        """
+        (lemmas, unit vector) of a prompt, or None when it is too vague to answer from cache
+        (follow-ups like "tell me more") or the model has no vectors.
+        """
+        lemmas, vector = self.embed(prompt)
+        norm = float(np.linalg.norm(vector)) if vector.size else 0.0
+        if len(lemmas) < self.min_lemmas or norm == 0:
+            return None
+        return lemmas, (vector / norm).astype(np.float32)
+
+    def lookup(self, scope, prompt):
+        features = self._features(prompt)
+        if features is None:
+            with self._lock:
+                self.counters['skipped'] += 1
+            return None
+        lemmas, vector = features
+
+        with self._lock:
+            index = self._scopes.get(scope)
+            if index is not None and len(index) and index.vectors.shape[1] == vector.size:
+                slot, similarity = index.best(vector)
+                entry_id = index.entry_ids[slot]
+                if entry_id is not None and similarity >= self.threshold:
+                    _, _, cached_lemmas, answer, expires_at = self._entries[entry_id]
+                    if expires_at < time.monotonic():
+                        self._evict(entry_id)
+                    elif self._overlap(lemmas, cached_lemmas) >= self.min_overlap:
+                        self._entries.move_to_end(entry_id)
+                        self.counters['hits'] += 1
+                        return answer
+            self.counters['misses'] += 1
+            return None
+
+    def store(self, scope, prompt, answer):
+        features = self._features(prompt)
+        if features is None or not answer:
+            return False
+        lemmas, vector = features
+
+        with self._lock:
+            index = self._scopes.get(scope)
+            if index is None or index.vectors.shape[1] != vector.size:
+                index = self._scopes[scope] = _ScopeIndex(vector.size)
+            entry_id = next(self._ids)
+            slot = index.add(vector, entry_id)
+            self._entries[entry_id] = (scope, slot, lemmas, answer, time.monotonic() + self.ttl)
+            self.counters['stores'] += 1
+            while len(self._entries) > self.maxsize:
+                self._evict(next(iter(self._entries)))
+        return True
+
+    def _overlap(self, a, b):
+        union = len(a | b)
+        return len(a & b) / union if union else 0.0
+
+    def _evict(self, entry_id):
+        scope, slot, _, _, _ = self._entries.pop(entry_id)
+        index = self._scopes[scope]
+        index.remove(slot)
+        if not len(index):
+            del self._scopes[scope]
+        self.counters['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._scopes.clear()
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            return {
+                **self.counters,
+                'entries': len(self._entries),
+                'scopes': len(self._scopes),
+                'hit_rate': round(self.counters['hits'] / lookups, 3) if lookups else 0.0
+            }
+
+# HR assistant answers, embedded with the spaCy model already loaded for matching
+chat_answer_cache = SemanticAnswerCache(
+    embed=lambda text: matching_service.embed_text(text),
+    maxsize=Config.CHAT_CACHE_SIZE,
+    ttl=Config.CHAT_CACHE_TTL,
+    threshold=Config.CHAT_CACHE_THRESHOLD
+)
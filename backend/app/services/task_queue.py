@@ -0,0 +1,83 @@
+import threading
+import uuid
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from ..database import db
+from ..models import Task
+
+class TaskQueue:
+    """
+    Runs slow generative requests on a bounded thread pool so they do not hold a WSGI worker
+    for the whole LLM round-trip. Task state and results live in the tasks table, so any
+    worker process can answer GET /api/tasks/<id>.
+
+    Submitted callables must not touch request-bound objects: routes read what they need from
+    the database first and hand over plain values. A callable returns (payload, status_code).
+    """
+    def __init__(self):
+        self._app = None
+        self.workers = 4
+        self.max_pending = 100
+        self.result_ttl = 3600
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self._app = app
+        self.workers = app.config.get('TASK_QUEUE_WORKERS', 4)
+        self.max_pending = app.config.get('TASK_QUEUE_MAX_PENDING', 100)
+        self.result_ttl = app.config.get('TASK_RESULT_TTL', 3600)
+
+    def submit(self, kind, fn, user_id=None):
+        """
+        Records a queued Task and schedules fn. Returns None when the queue is full.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return None
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=max(self.workers, 1), thread_name_prefix='tasks')
+
+        try:
+            self._prune()
+            task = Task(id=str(uuid.uuid4()), user_id=user_id, kind=kind, status='queued')
+            db.session.add(task)
+            db.session.commit()
+            self._executor.submit(self._run, task.id, fn)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return task
+
+    def _run(self, task_id, fn):
+        try:
+            with self._app.app_context():
+                self._set(task_id, status='running')
+                try:
+                    payload, status_code = fn()
+                    self._set(task_id, status='done', result=json.dumps(payload), status_code=status_code,
+                              finished_at=datetime.utcnow())
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Task {task_id} failed: {e}")
+                    self._set(task_id, status='failed', error=str(e), status_code=500, finished_at=datetime.utcnow())
+                finally:
+                    db.session.remove()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _set(self, task_id, **values):
+        Task.query.filter_by(id=task_id).update(values)
+        db.session.commit()
+
+    def _prune(self):
+        """Drops finished tasks whose results are older than the TTL."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.result_ttl)
+        Task.query.filter(Task.finished_at < cutoff).delete()
+
+task_queue = TaskQueue()
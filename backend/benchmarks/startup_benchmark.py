@@ -0,0 +1,62 @@
+"""
+Cold-start benchmark for the backend.
+
+Each scenario runs in a fresh interpreter and reports wall time and peak RSS:
+  - eager_full:   app import + full en_core_web_md load (what every process paid before)
+  - lazy:         app import + create_app, model not loaded
+  - lazy_warmup:  app import + create_app + warmup() of the trimmed pipeline
+
+Usage (from backend/):  python benchmarks/startup_benchmark.py [--runs 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIO_CODE = r'''
+import json, resource, sys, time
+start = time.perf_counter()
+from app import create_app
+from app.services.matching_service import matching_service, MODEL_NAME
+app = create_app()
+scenario = sys.argv[1]
+if scenario == "eager_full":
+    import spacy
+    try:
+        spacy.load(MODEL_NAME)
+    except OSError:
+        spacy.blank("en")
+elif scenario == "lazy_warmup":
+    matching_service.warmup()
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+print(json.dumps({"seconds": elapsed, "rss_mb": rss_mb}))
+'''
+
+SCENARIOS = ["eager_full", "lazy", "lazy_warmup"]
+
+def run_scenario(name):
+    out = subprocess.run(
+        [sys.executable, "-c", SCENARIO_CODE, name],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<14}{'best s':>10}{'mean s':>10}{'peak RSS MB':>14}")
+    for name in SCENARIOS:
+        results = [run_scenario(name) for _ in range(args.runs)]
+        seconds = [r["seconds"] for r in results]
+        rss = max(r["rss_mb"] for r in results)
+        print(f"{name:<14}{min(seconds):>10.2f}{sum(seconds) / len(seconds):>10.2f}{rss:>14.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -8,4 +8,7 @@ if __name__ == '__main__':
             from app.seed_data import seed_database
             seed_database()
             print("--- Database seeded successfully. Starting Server... ---")
+    # Load the matching model before serving so the first request isn't slow
+    from app.services.matching_service import matching_service
+    matching_service.warmup()
     app.run(port=5000)
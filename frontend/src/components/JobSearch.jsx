@@ -1,9 +1,31 @@
-import React, { useState, useEffect } from "react";
-import { getJobs, applyToJob, getApplications } from '../services/api';
+import React, { useState, useEffect, useRef } from "react";
+import { searchJobs, applyToJob, getApplications } from '../services/api';
+
+const PAGE_SIZE = 50;
+
+// Sidebar filter -> /jobs/search parameter
+const FILTER_PARAMS = {
+  jobType: 'type',
+  remoteOption: 'remote_option',
+  experienceLevel: 'experience_level',
+  education: 'education',
+  minSalary: 'min_salary',
+  maxSalary: 'max_salary'
+};
+
+const isUnfiltered = (query, filters) =>
+  !query.trim() && Object.values(filters).every(value => (Array.isArray(value) ? value.length === 0 : !value));
 
 const JobSearch = ({ onViewJob }) => {
   const [searchQuery, setSearchQuery] = useState("");
+  const [query, setQuery] = useState(""); // searchQuery once the user pauses typing
   const [jobs, setJobs] = useState([]);
+  const [facets, setFacets] = useState({});
+  const [total, setTotal] = useState(0);
+  const [page, setPage] = useState(1);
+  const [hasMore, setHasMore] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const latestRequest = useRef(0);
   const [appliedJobIds, setAppliedJobIds] = useState(new Set());
   const [applyingId, setApplyingId] = useState(null);
   const [status, setStatus] = useState({ msg: '', type: '' });
@@ -91,81 +113,93 @@ const JobSearch = ({ onViewJob }) => {
     setTimeout(() => setStatus({ msg: '', type: '' }), 3000);
   };
 
+  const toParams = (currentFilters) => {
+    const params = {};
+    Object.entries(FILTER_PARAMS).forEach(([key, param]) => { params[param] = currentFilters[key]; });
+    return params;
+  };
+
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const result = await searchJobs({ q: query, filters: toParams(filters), page: page + 1, limit: PAGE_SIZE });
+      const seen = new Set(jobs.map(job => job.id));
+      setJobs([...jobs, ...result.jobs.filter(job => !seen.has(job.id))]);
+      setPage(page + 1);
+      setHasMore(result.hasMore);
+    } catch (err) {
+      console.error("Fetch error", err);
+    }
+    setLoadingMore(false);
+  };
+
+  // Debounce typing; the Search button applies the query at once
   useEffect(() => {
-    async function fetchData() {
-      // 1. Instant Load from Cache (Stale Data)
+    const timer = setTimeout(() => setQuery(searchQuery), 300);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
+  useEffect(() => {
+    async function fetchApplications() {
+      // Instant load from cache (stale data) for the unfiltered board
       const cached = sessionStorage.getItem("job_search_cache");
       if (cached) {
           try {
               const { jobs: cachedJobs, appliedIds: cachedIds } = JSON.parse(cached);
-              setJobs(cachedJobs);
+              setJobs(prev => (prev.length ? prev : cachedJobs));
               setAppliedJobIds(new Set(cachedIds));
           } catch (e) {
               console.error("Cache parse error", e);
           }
       }
 
-      // 2. Fetch Fresh Data (Revalidate)
       try {
-        const [jobsData, appsData] = await Promise.all([getJobs(), getApplications()]);
-        
+        const appsData = await getApplications();
         const appliedIds = new Set(appsData.map(app => app.job_id));
-        
-        // Update State
-        setJobs(jobsData);
         setAppliedJobIds(appliedIds);
-
-        // Update Cache
-        sessionStorage.setItem("job_search_cache", JSON.stringify({
-            jobs: jobsData,
-            appliedIds: Array.from(appliedIds)
-        }));
+        const stale = sessionStorage.getItem("job_search_cache");
+        const parsed = stale ? JSON.parse(stale) : { jobs: [] };
+        parsed.appliedIds = Array.from(appliedIds);
+        sessionStorage.setItem("job_search_cache", JSON.stringify(parsed));
       } catch (err) {
           console.error("Fetch error", err);
       }
     }
-    fetchData();
+    fetchApplications();
   }, []);
 
-  const filteredJobs = jobs.filter((job) => {
-    const matchesSearch = (job.title && job.title.toLowerCase().includes(searchQuery.toLowerCase())) || 
-                          (job.company && job.company.toLowerCase().includes(searchQuery.toLowerCase()));
-    
-    const matchesJobType = filters.jobType.length === 0 || filters.jobType.includes(job.type);
-    const matchesRemote = filters.remoteOption.length === 0 || filters.remoteOption.includes(job.remote_option);
-    const matchesExp = filters.experienceLevel.length === 0 || filters.experienceLevel.includes(job.experience_level);
-    const matchesEdu = filters.education.length === 0 || filters.education.includes(job.education);
-    
-    let matchesSalary = true;
-    if (filters.minSalary || filters.maxSalary) {
-        const jobSalary = job.salary ? parseInt(job.salary.replace(/[^0-9]/g, ''), 10) : 0;
-        
-        if (isNaN(jobSalary) || jobSalary === 0) {
-             if (filters.minSalary || filters.maxSalary) matchesSalary = false;
-        } else {
-            if (filters.minSalary && jobSalary < parseInt(filters.minSalary)) matchesSalary = false;
-            if (filters.maxSalary && jobSalary > parseInt(filters.maxSalary)) matchesSalary = false;
+  // Every change of the query or the filters asks the server for the first page again
+  useEffect(() => {
+    const requestId = ++latestRequest.current;
+    async function fetchJobs() {
+      try {
+        const result = await searchJobs({ q: query, filters: toParams(filters), page: 1, limit: PAGE_SIZE });
+        // A newer search was started meanwhile
+        if (requestId !== latestRequest.current) return;
+        setJobs(result.jobs);
+        setFacets(result.facets);
+        setTotal(result.total);
+        setPage(1);
+        setHasMore(result.hasMore);
+
+        if (isUnfiltered(query, filters)) {
+          const cached = sessionStorage.getItem("job_search_cache");
+          const parsed = cached ? JSON.parse(cached) : { appliedIds: [] };
+          parsed.jobs = result.jobs;
+          sessionStorage.setItem("job_search_cache", JSON.stringify(parsed));
         }
+      } catch (err) {
+          console.error("Fetch error", err);
+      }
     }
+    fetchJobs();
+  }, [query, filters]);
 
-    return matchesSearch && matchesJobType && matchesRemote && matchesExp && matchesEdu && matchesSalary;
-  });
-
+  // Counts over the whole result set, from the server's facets
   const getFilterCount = (category, value) => {
-    return jobs.filter(job => {
-      const matchesSearch = (job.title && job.title.toLowerCase().includes(searchQuery.toLowerCase())) || 
-                            (job.company && job.company.toLowerCase().includes(searchQuery.toLowerCase()));
-      if (!matchesSearch) return false;
-      
-      const key = {
-        'jobType': 'type',
-        'remoteOption': 'remote_option',
-        'experienceLevel': 'experience_level',
-        'education': 'education'
-      }[category];
-      
-      return job[key] === value;
-    }).length;
+    const values = facets[FILTER_PARAMS[category]] || [];
+    const facet = values.find(item => item.value === value);
+    return facet ? facet.count : 0;
   };
 
   return (
@@ -177,13 +211,13 @@ const JobSearch = ({ onViewJob }) => {
       <div className="bg-white/80 shadow rounded-2xl p-5 flex flex-wrap gap-3 md:gap-4 items-center border border-blue-100">
         <input
           type="text"
-          placeholder="Job title, keywords or company"
+          placeholder="Job title, skills or keywords"
           value={searchQuery}
           onChange={(e) => setSearchQuery(e.target.value)}
           className="bg-blue-50 border-none rounded-full px-5 py-3 flex-1 min-w-[200px] focus:outline-none focus:ring-2 focus:ring-[#013362] text-[#013362] placeholder:text-[#013362] text-sm shadow-sm"
         />
         <div className="flex gap-2 ml-auto mt-2 md:mt-0">
-          <button className="px-5 py-3 rounded-full text-sm font-semibold flex items-center gap-2 bg-gradient-to-r from-[#005193] to-[#013362] text-white shadow-lg hover:opacity-90 transition">
+          <button onClick={() => setQuery(searchQuery)} className="px-5 py-3 rounded-full text-sm font-semibold flex items-center gap-2 bg-gradient-to-r from-[#005193] to-[#013362] text-white shadow-lg hover:opacity-90 transition">
             Search Jobs
           </button>
         </div>
@@ -252,7 +286,7 @@ const JobSearch = ({ onViewJob }) => {
           <div className="mb-5">
             <h4 className="font-bold mb-2 text-base text-[#013362]">Education</h4>
             <ul className="text-sm space-y-1 text-gray-700">
-              {['Bachelor’s', 'Master’s', 'PhD'].map((edu) => (
+              {["Bachelor's", "Master's", 'PhD'].map((edu) => (
                 <li key={edu} className="flex items-center gap-2">
                   <input 
                     type="checkbox" 
@@ -293,7 +327,8 @@ const JobSearch = ({ onViewJob }) => {
 
         {/* Job Listings */}
         <main className="space-y-4">
-          {filteredJobs.map((job) => (
+          <p className="text-sm text-gray-500">{total} {total === 1 ? 'job' : 'jobs'} found</p>
+          {jobs.map((job) => (
             <div
               key={job.id}
               className="bg-white rounded-2xl border border-blue-100 shadow p-6 hover:shadow-lg transition flex flex-col gap-2"
@@ -391,6 +426,19 @@ const JobSearch = ({ onViewJob }) => {
               </div>
             </div>
           ))}
+
+          {/* Next page of the board (best matches first when logged in) */}
+          {hasMore && (
+            <div className="flex justify-center">
+              <button
+                className="px-5 py-2 rounded-full text-sm font-semibold text-[#005193] bg-white border border-blue-200 shadow-sm hover:bg-blue-50 transition"
+                onClick={handleLoadMore}
+                disabled={loadingMore}
+              >
+                {loadingMore ? 'Loading...' : 'Load more jobs'}
+              </button>
+            </div>
+          )}
         </main>
       </div>
     </div>
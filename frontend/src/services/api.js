@@ -74,12 +74,31 @@ export const changePassword = async (passwordData) => {
 // --- Job Seeker API ---
 
 export const getJobs = async (limit) => {
-    const url = limit ? `/jobs?limit=${limit}` : "/jobs";
-    const res = await axiosAuth.get(url);
+    const res = await axiosAuth.get(limit ? `/jobs?limit=${limit}` : "/jobs");
     if (res.data.jobs) return res.data.jobs;
     return res.data;
 };
 
+// One page of job search results. Matching, filters, facet counts and the order (best matches
+// first when logged in) are all handled server-side, over every job rather than a loaded page.
+export const searchJobs = async ({ q = "", filters = {}, page = 1, limit = 50 } = {}) => {
+    const params = { q, page, limit };
+    Object.entries(filters).forEach(([key, value]) => {
+        if (Array.isArray(value)) {
+            if (value.length) params[key] = value.join(",");
+        } else if (value !== "" && value !== null && value !== undefined) {
+            params[key] = value;
+        }
+    });
+    const res = await axiosAuth.get("/jobs/search", { params });
+    return {
+        jobs: res.data.jobs,
+        facets: res.data.facets || {},
+        total: res.data.pagination.total_items,
+        hasMore: res.data.pagination.has_more,
+    };
+};
+
 export const applyToJob = async (jobId) => {
     const userId = localStorage.getItem("user_id") || "1";
     const res = await axiosAuth.post("/applications", {